@@ -0,0 +1,177 @@
+#####################################################################
+# Benchmarks of the CEL algorithm
+#
+# Canonical scenarios (the direct-entry examples of CEL_Algorithm_1.py and
+# CEL_Algorithm_2.py) with fixed seeds. For every Number_of_simulations it
+# times the NPV generation, the descriptive statistics and the full run,
+# and for every k each integration block (P(NPV < 0) and CEL, P(NPV < CEL),
+# CVaR), recording peak memory. Results are written as JSON lines tagged
+# with the git commit so runs can be compared across commits.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_cel.py --output bench.jsonl
+#   python benchmarks/bench_cel.py --simulations 10000 100000000 --k 1000 1000000 --output bench.jsonl
+#   python benchmarks/bench_cel.py --compare old.jsonl new.jsonl
+#####################################################################
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from cel_algorithm.evaluation import result_from_accumulator, result_from_sample  # noqa: E402
+from cel_algorithm.integration import METHODS, Z_5, normal_tail_integrals  # noqa: E402
+from cel_algorithm.simulation import descriptive_statistics, simulate_npv  # noqa: E402
+from cel_algorithm.spec import ProjectSpec  # noqa: E402
+from cel_algorithm.streaming import simulate_npv_streaming  # noqa: E402
+
+SCENARIOS = {
+    # CEL_Algorithm_1.py: 3 periods, fixed cash-flow distribution
+    "algorithm_1_fixed_3": ProjectSpec.fixed(3, 0.05, 0.10, 0.20, 90000000, 120000000,
+                                             40000000, 50000000, 55000000, 0),
+    # CEL_Algorithm_2.py: 10 periods, annually adjusted cash-flow distribution
+    "algorithm_2_adjusted_10": ProjectSpec(
+        10, 0.08, 0.1, 0.14, 2000000, 3000000,
+        [80000, 160000, 240000, 320000, 400000, 480000, 560000, 640000, 720000, 800000],
+        [100000, 200000, 300000, 400000, 500000, 600000, 700000, 800000, 900000, 1000000],
+        [120000, 240000, 360000, 480000, 600000, 720000, 840000, 960000, 1080000, 1200000],
+        250000),
+}
+
+SEED = 20240101
+STREAMING_THRESHOLD = 10 ** 7  # larger runs use the constant-memory streaming engine
+DEFAULT_SIMULATIONS = (10 ** 4, 10 ** 5, 10 ** 6)
+DEFAULT_K = (10 ** 3, 10 ** 5)
+
+
+def measure(function, *args, **kwargs):
+    """
+    Runs function once and returns (result, wall seconds, cpu seconds, peak traced bytes).
+    """
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    result = function(*args, **kwargs)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, wall, cpu, peak
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmarks(simulations, partitions, methods, repeat=1):
+    """
+    Yields one record per (scenario, stage, size) with the best of repeat timings.
+    """
+    header = {"commit": git_commit(), "python": platform.python_version(), "numpy": np.__version__,
+              "machine": platform.machine(), "seed": SEED}
+
+    def record(scenario, stage, function, **parameters):
+        best = None
+        for _ in range(repeat):
+            result, wall, cpu, peak = measure(function)
+            if best is None or wall < best[0]:
+                best = (wall, cpu, peak)
+        return result, dict(header, scenario=scenario, stage=stage, wall_seconds=best[0], cpu_seconds=best[1],
+                            peak_bytes=best[2], **parameters)
+
+    for name, spec in SCENARIOS.items():
+        for Number_of_simulations in simulations:
+            size = {"Number_of_simulations": Number_of_simulations}
+            if Number_of_simulations < STREAMING_THRESHOLD:
+                NPV, row = record(name, "npv_generation", lambda: simulate_npv(
+                    spec.Planning_Horizon, Number_of_simulations, *spec.simulation_arguments(), rng=SEED), **size)
+                yield row
+                descriptive, row = record(name, "descriptive_statistics", lambda: descriptive_statistics(NPV), **size)
+                yield row
+                _, row = record(name, "full_run", lambda: result_from_sample(spec, simulate_npv(
+                    spec.Planning_Horizon, Number_of_simulations, *spec.simulation_arguments(), rng=SEED)), **size)
+                yield row
+                del NPV
+            else:
+                Accumulator, row = record(name, "npv_generation_streaming", lambda: simulate_npv_streaming(
+                    spec.Planning_Horizon, Number_of_simulations, *spec.simulation_arguments(), rng=SEED), **size)
+                yield row
+                descriptive = Accumulator.descriptive_statistics()
+                _, row = record(name, "full_run_streaming", lambda: result_from_accumulator(
+                    spec, simulate_npv_streaming(spec.Planning_Horizon, Number_of_simulations,
+                                                 *spec.simulation_arguments(), rng=SEED)), **size)
+                yield row
+
+        # Integration blocks on the moments of the largest run
+        NPV_mean = descriptive["NPV_mean"]
+        NPV_standard_deviation = descriptive["NPV_standard_deviation"]
+        for method in methods:
+            for k in (partitions if method != "analytic" else (None,)):
+                parameters = {"method": method, "k": k}
+                (P_0, CEL_uper), row = record(name, "integration_deficit_and_CEL", lambda: normal_tail_integrals(
+                    0.0, NPV_mean, NPV_standard_deviation, method, k), **parameters)
+                yield row
+                CEL = CEL_uper / P_0
+                _, row = record(name, "integration_P_NPV_less_CEL", lambda: normal_tail_integrals(
+                    CEL, NPV_mean, NPV_standard_deviation, method, k), **parameters)
+                yield row
+                _, row = record(name, "integration_CVaR", lambda: normal_tail_integrals(
+                    NPV_mean - Z_5 * NPV_standard_deviation, NPV_mean, NPV_standard_deviation, method, k),
+                    **parameters)
+                yield row
+
+
+def compare(old_path, new_path):
+    """
+    Prints new / old wall-time ratios of the records present in both files.
+    """
+    def load(path):
+        with open(path) as file:
+            rows = [json.loads(line) for line in file if line.strip()]
+        return {(row["scenario"], row["stage"], row.get("Number_of_simulations"), row.get("method"), row.get("k")):
+                row for row in rows}
+
+    old, new = load(old_path), load(new_path)
+    for key in sorted(set(old) & set(new), key=str):
+        ratio = new[key]["wall_seconds"] / old[key]["wall_seconds"]
+        print(f"{ratio:8.2f}x  {' '.join(str(part) for part in key if part is not None)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CEL algorithm.")
+    parser.add_argument("--simulations", type=int, nargs="+", default=DEFAULT_SIMULATIONS)
+    parser.add_argument("--k", type=int, nargs="+", default=DEFAULT_K, help="partitions of the numerical integration")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=METHODS)
+    parser.add_argument("--repeat", type=int, default=1, help="keep the best of REPEAT timings")
+    parser.add_argument("--output", help="JSON lines file to append the results to (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        for row in run_benchmarks(args.simulations, args.k, args.methods, args.repeat):
+            output.write(json.dumps(row) + "\n")
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
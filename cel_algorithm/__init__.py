@@ -0,0 +1,133 @@
+#This code is an integral part of the submitted article "LIMA, J. D. de; SILVA, R. da R. da; DRANKA, G. G.; RIBEIRO, M. H. D. M.; SOUTHIER, L. F. Introducing Conditional Expected Loss: A Novel Metric for Risk Investment Analysis. The Engineering Economist, 2024".
+
+"""
+Reusable building blocks of the CEL (Conditional Expected Loss) algorithm.
+
+CEL_Algorithm_1.py and CEL_Algorithm_2.py are thin scripts on top of this package;
+evaluate_project is the entry point for use as a library.
+"""
+
+from cel_algorithm.adaptive import AdaptiveRun, evaluate_project_adaptive, simulate_npv_adaptive
+from cel_algorithm.batch import evaluate_portfolio, read_specs, write_results
+from cel_algorithm.cache import ResultCache, cache_key
+from cel_algorithm.correlation import (
+    ar1_correlation,
+    evaluate_project_correlated,
+    gaussian_copula,
+    simulate_npv_correlated,
+)
+from cel_algorithm.distributions import (
+    DISTRIBUTIONS,
+    InputDistributions,
+    distribution,
+    evaluate_project_distributions,
+    register_distribution,
+    simulate_npv_distributions,
+)
+from cel_algorithm.empirical import (
+    empirical_statistics,
+    empirical_tail_mean,
+    empirical_var_cvar,
+)
+from cel_algorithm.evaluation import ProjectResult, evaluate_project, result_from_accumulator, result_from_sample
+from cel_algorithm.incremental import IncrementalEvaluation
+from cel_algorithm.instrumentation import InstrumentationStats, get_stats, instrumented
+from cel_algorithm.integration import (
+    inferential_statistics,
+    integrate,
+    normal_tail_integrals,
+)
+from cel_algorithm.parallel import (
+    simulate_npv_parallel,
+    spawn_generators,
+)
+from cel_algorithm.rare_event import cross_entropy_tilt, deficit_importance_sampling
+from cel_algorithm.risk_profile import empirical_risk_profile, normal_risk_profile
+from cel_algorithm.sampling import replicate_statistics, sample_uniforms, simulate_npv_sampled
+from cel_algorithm.sensitivity import npv_derivatives, parameter_labels, statistic_sensitivities
+from cel_algorithm.service import EvaluationService
+from cel_algorithm.simulation import (
+    descriptive_statistics,
+    discount_factors,
+    draw_uniforms,
+    npv_from_uniforms,
+    simulate_npv,
+    triangular_ppf,
+    uniform_ppf,
+)
+from cel_algorithm.store import NpvStore, write_npv_store
+from cel_algorithm.streaming import (
+    OnlineMoments,
+    QuantileSketch,
+    StreamingAccumulator,
+    iter_npv_chunks,
+    simulate_npv_streaming,
+)
+from cel_algorithm.spec import ProjectSpec
+from cel_algorithm.sweep import CommonRandomNumbers, sweep, tornado
+
+__all__ = [
+    "AdaptiveRun",
+    "CommonRandomNumbers",
+    "DISTRIBUTIONS",
+    "EvaluationService",
+    "IncrementalEvaluation",
+    "InputDistributions",
+    "InstrumentationStats",
+    "NpvStore",
+    "OnlineMoments",
+    "ProjectResult",
+    "ProjectSpec",
+    "QuantileSketch",
+    "ResultCache",
+    "StreamingAccumulator",
+    "ar1_correlation",
+    "cache_key",
+    "cross_entropy_tilt",
+    "deficit_importance_sampling",
+    "descriptive_statistics",
+    "discount_factors",
+    "distribution",
+    "draw_uniforms",
+    "empirical_risk_profile",
+    "empirical_statistics",
+    "empirical_tail_mean",
+    "empirical_var_cvar",
+    "evaluate_portfolio",
+    "evaluate_project",
+    "evaluate_project_adaptive",
+    "evaluate_project_correlated",
+    "evaluate_project_distributions",
+    "gaussian_copula",
+    "get_stats",
+    "inferential_statistics",
+    "instrumented",
+    "integrate",
+    "iter_npv_chunks",
+    "normal_risk_profile",
+    "normal_tail_integrals",
+    "npv_derivatives",
+    "npv_from_uniforms",
+    "parameter_labels",
+    "read_specs",
+    "register_distribution",
+    "replicate_statistics",
+    "result_from_accumulator",
+    "result_from_sample",
+    "sample_uniforms",
+    "simulate_npv",
+    "simulate_npv_adaptive",
+    "simulate_npv_correlated",
+    "simulate_npv_distributions",
+    "simulate_npv_parallel",
+    "simulate_npv_sampled",
+    "simulate_npv_streaming",
+    "spawn_generators",
+    "statistic_sensitivities",
+    "sweep",
+    "tornado",
+    "triangular_ppf",
+    "uniform_ppf",
+    "write_npv_store",
+    "write_results",
+]
@@ -0,0 +1,16 @@
+#####################################################################
+# python -m cel_algorithm                 interactive evaluation of one project
+# python -m cel_algorithm batch IN OUT    portfolio batch mode (see batch.py)
+# python -m cel_algorithm serve           evaluation service (see service.py)
+#####################################################################
+
+import sys
+
+from cel_algorithm import batch, cli, service
+
+if len(sys.argv) > 1 and sys.argv[1] == "batch":
+    batch.main(sys.argv[2:])
+elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+    service.main(sys.argv[2:])
+else:
+    cli.main()
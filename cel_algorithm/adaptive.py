@@ -0,0 +1,121 @@
+#####################################################################
+# Adaptive precision control
+#
+# Instead of a fixed Number_of_simulations, NPVs are simulated in batches
+# until the confidence intervals of P(NPV < 0), CEL and CVaR_alpha are
+# within a relative tolerance of their estimates, or the simulation or
+# time budget runs out. Confidence intervals use the batch-means method:
+# the batches are independent, so the spread of the per-batch estimates
+# gives the standard error of the pooled estimate. Without simulated
+# losses CEL is undefined, so the run also stops once no batch had a
+# negative NPV (P(NPV < 0) = 0 with a zero-width interval) or the NPV
+# moments show a low probability of financial deficit.
+#####################################################################
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from cel_algorithm.empirical import empirical_statistics
+from cel_algorithm.evaluation import result_from_accumulator
+from cel_algorithm.integration import deficit_probability_is_low, normal_ppf
+from cel_algorithm.sampling import check_sample_size, sample_uniforms
+from cel_algorithm.simulation import as_random_source, npv_from_uniforms, seed_source
+from cel_algorithm.streaming import DEFAULT_COMPRESSION, StreamingAccumulator
+
+TARGETS = ("Probability_of_Financial_Deficit", "CEL", "CVaR_5")
+MIN_BATCHES = 5
+STOP_REASONS = ("converged", "no_deficit", "low_deficit_probability", "max_simulations", "max_seconds")
+
+
+@dataclass
+class AdaptiveRun:
+    """
+    Outcome of an adaptive simulation: the accumulated NPVs, the number of
+    draws used, whether the tolerance was reached, why the run stopped (one
+    of STOP_REASONS) and, per target, (estimate, confidence interval half-width).
+    """
+
+    Accumulator: StreamingAccumulator
+    Number_of_simulations: int
+    converged: bool
+    confidence_intervals: dict = field(default_factory=dict)
+    stop_reason: str = "converged"
+
+
+def simulate_npv_adaptive(Planning_Horizon, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                          CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0,
+                          relative_tolerance=0.01, confidence=0.95, batch_size=10000, max_simulations=10 ** 8,
+                          max_seconds=None, alpha=0.05, sampling="random", rng=None,
+                          compression=DEFAULT_COMPRESSION):
+    """
+    Simulates batches of batch_size NPVs until every target in TARGETS has a
+    confidence interval half-width <= relative_tolerance * |estimate|.
+
+    Stops early when no simulated NPV is negative, when the probability of
+    financial deficit is low (integration.deficit_probability_is_low), or
+    when max_simulations draws or max_seconds are used; at least MIN_BATCHES
+    batches are always simulated. Memory is bounded by batch_size.
+    """
+    if max_simulations < MIN_BATCHES * batch_size:
+        raise ValueError(f"max_simulations must be at least MIN_BATCHES * batch_size = {MIN_BATCHES * batch_size}")
+    check_sample_size(batch_size, sampling)
+    rng = as_random_source(rng)
+    z = normal_ppf(0.5 + confidence / 2)
+    start = time.perf_counter()
+    Accumulator = StreamingAccumulator(compression)
+    Batch_estimates = {key: [] for key in TARGETS}
+    confidence_intervals = {}
+    converged = False
+
+    while Accumulator.count + batch_size <= max_simulations:
+        U = sample_uniforms(batch_size, Planning_Horizon, sampling, rng)
+        NPV = npv_from_uniforms(U, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+        Accumulator.update(NPV)
+        Batch = empirical_statistics(NPV, alpha)
+        for key in TARGETS:
+            Batch_estimates[key].append(Batch[key])
+
+        if len(Batch_estimates[TARGETS[0]]) < MIN_BATCHES:
+            continue
+        Pooled = Accumulator.empirical_statistics(alpha)
+        converged = True
+        for key in TARGETS:
+            estimates = np.array(Batch_estimates[key], dtype=float)
+            estimates = estimates[~np.isnan(estimates)]
+            half_width = z * np.std(estimates, ddof=1) / np.sqrt(estimates.size) if estimates.size > 1 else np.inf
+            confidence_intervals[key] = (Pooled[key], half_width)
+            if not half_width <= relative_tolerance * abs(Pooled[key]):
+                converged = False
+        if converged:
+            stop_reason = "converged"
+            break
+        # CEL is undefined without losses: it can never become precise
+        if Accumulator.count_below_0 == 0:
+            stop_reason = "no_deficit"
+            break
+        if deficit_probability_is_low(Accumulator.moments.mean, Accumulator.moments.standard_deviation):
+            stop_reason = "low_deficit_probability"
+            break
+        if max_seconds is not None and time.perf_counter() - start >= max_seconds:
+            stop_reason = "max_seconds"
+            break
+    else:
+        stop_reason = "max_simulations"
+
+    return AdaptiveRun(Accumulator, Accumulator.count, converged, confidence_intervals, stop_reason)
+
+
+def evaluate_project_adaptive(spec, relative_tolerance=0.01, seed=None, method="analytic", k=100000, alpha=0.05,
+                              **options):
+    """
+    evaluation.evaluate_project with an adaptive number of simulations.
+
+    Returns (ProjectResult, AdaptiveRun); options are passed to simulate_npv_adaptive.
+    """
+    rng = seed_source(seed)
+    Run = simulate_npv_adaptive(spec.Planning_Horizon, *spec.simulation_arguments(),
+                                relative_tolerance=relative_tolerance, alpha=alpha, rng=rng, **options)
+    return result_from_accumulator(spec, Run.Accumulator, method, k, alpha), Run
@@ -0,0 +1,153 @@
+#####################################################################
+# Portfolio batch mode
+#
+# Evaluates a table of project specs (CSV or Parquet) in one run and
+# writes one row of STATISTICS DESCRIPTIVE and STATISTICS INFERENTIAL per
+# project. Projects with the same Planning_Horizon share one block of
+# simulated uniforms and are evaluated together as a 3-D array
+# (projects x simulations x periods); projects with the same WACC
+# triangle also share the discount factors. group_npv also takes one
+# uniform block per project, as the evaluation service does for requests
+# that each have their own random stream.
+#
+# Usage: python -m cel_algorithm batch projects.csv results.csv --simulations 10000 --seed 1
+#####################################################################
+
+import argparse
+import csv
+
+import numpy as np
+
+from cel_algorithm.evaluation import INFERENTIAL_KEYS, result_from_sample
+from cel_algorithm.integration import METHODS
+from cel_algorithm.simulation import (
+    CF_0_COLUMN,
+    FIRST_CF_COLUMN,
+    WACC_COLUMN,
+    as_random_source,
+    discount_factors,
+    draw_uniforms,
+    npv_from_draws,
+    triangular_ppf,
+    uniform_ppf,
+)
+from cel_algorithm.spec import ProjectSpec
+
+MAX_BLOCK_ELEMENTS = 2 ** 24  # projects x simulations x periods evaluated at once
+
+DESCRIPTIVE_COLUMNS = ("NPV_minimum", "NPV_maximum", "NPV_range", "NPV_mean", "NPV_standard_deviation",
+                       "NPV_Coefficient_of_variation", "NPV_median")
+INFERENTIAL_COLUMNS = INFERENTIAL_KEYS
+RESULT_COLUMNS = (("name", "Planning_Horizon", "Number_of_simulations") + DESCRIPTIVE_COLUMNS
+                  + ("Low_deficit_probability",) + INFERENTIAL_COLUMNS
+                  + tuple("Empirical_" + column for column in INFERENTIAL_COLUMNS))
+
+
+def read_specs(path):
+    """
+    Reads project specs from a .csv or .parquet table (one project per row, see ProjectSpec.from_record).
+
+    An invalid row raises ValueError naming its row number (1 = first project).
+    """
+    if str(path).endswith(".parquet"):
+        import pandas as pd  # optional dependency, only needed for Parquet
+        records = pd.read_parquet(path).to_dict("records")
+    else:
+        with open(path, newline="") as file:
+            records = list(csv.DictReader(file))
+    specs = []
+    for row, record in enumerate(records, 1):
+        try:
+            specs.append(ProjectSpec.from_record(record))
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"{path}: invalid project in row {row}: {error}") from error
+    return specs
+
+
+def write_results(rows, path):
+    """
+    Writes result rows to a .csv or .parquet table with RESULT_COLUMNS.
+    """
+    if str(path).endswith(".parquet"):
+        import pandas as pd  # optional dependency, only needed for Parquet
+        pd.DataFrame(rows, columns=RESULT_COLUMNS).to_parquet(path, index=False)
+        return
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def group_npv(U, specs):
+    """
+    NPV of every project in specs (same Planning_Horizon) for the uniform block U.
+
+    U is either one block shared by every project, of shape (Number_of_simulations,
+    Planning_Horizon + 2), or one block per project, of shape (len(specs),
+    Number_of_simulations, Planning_Horizon + 2). Returns an array of shape
+    (len(specs), Number_of_simulations); row p equals
+    simulation.npv_from_uniforms(U or U[p], *specs[p].simulation_arguments()).
+    """
+    Planning_Horizon = U.shape[-1] - FIRST_CF_COLUMN
+    CF_0_m = np.array([spec.CF_0_m for spec in specs])[:, None]
+    CF_0_M = np.array([spec.CF_0_M for spec in specs])[:, None]
+    RV = np.array([spec.RV for spec in specs])[:, None]
+    CF_m = np.array([spec.CF_distributions_m for spec in specs])[:, None, :]
+    CF_ml = np.array([spec.CF_distributions_ml for spec in specs])[:, None, :]
+    CF_M = np.array([spec.CF_distributions_M for spec in specs])[:, None, :]
+
+    WACC_parameters = np.array([(spec.WACC_m, spec.WACC_ml, spec.WACC_M) for spec in specs])
+    if U.ndim == 2:
+        # Discount factors are computed once per distinct WACC triangle
+        Unique_WACC, inverse = np.unique(WACC_parameters, axis=0, return_inverse=True)
+        WACC = triangular_ppf(U[:, WACC_COLUMN], Unique_WACC[:, 0, None], Unique_WACC[:, 1, None],
+                              Unique_WACC[:, 2, None])
+        discount = discount_factors(WACC, Planning_Horizon)[inverse.ravel()]
+        U = U[None]
+    else:
+        WACC = triangular_ppf(U[:, :, WACC_COLUMN], WACC_parameters[:, 0, None], WACC_parameters[:, 1, None],
+                              WACC_parameters[:, 2, None])
+        discount = discount_factors(WACC, Planning_Horizon)
+
+    CF = triangular_ppf(U[:, :, FIRST_CF_COLUMN:], CF_m, CF_ml, CF_M)
+    return npv_from_draws(uniform_ppf(U[:, :, CF_0_COLUMN], CF_0_m, CF_0_M), CF, discount, RV)
+
+
+def evaluate_portfolio(specs, Number_of_simulations, rng=None, method="analytic", k=100000, alpha=0.05):
+    """
+    Evaluates every project and returns one result row (dict with RESULT_COLUMNS) per spec, in input order.
+
+    Inferential columns are nan when NPV_mean - 6 * NPV_standard_deviation > 0
+    (Low_deficit_probability), where the scripts stop.
+    """
+    rng = as_random_source(rng)
+    rows = [None] * len(specs)
+    by_horizon = {}
+    for index, spec in enumerate(specs):
+        by_horizon.setdefault(spec.Planning_Horizon, []).append(index)
+
+    for Planning_Horizon in sorted(by_horizon):
+        indices = by_horizon[Planning_Horizon]
+        U = draw_uniforms(Number_of_simulations, Planning_Horizon, rng)
+        block = max(1, MAX_BLOCK_ELEMENTS // (Number_of_simulations * Planning_Horizon))
+        for start in range(0, len(indices), block):
+            block_indices = indices[start:start + block]
+            NPV = group_npv(U, [specs[i] for i in block_indices])
+            for p, index in enumerate(block_indices):
+                rows[index] = result_from_sample(specs[index], NPV[p], method, k, alpha).to_record()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cel_algorithm batch", description="Evaluate a portfolio of projects with the CEL algorithm.")
+    parser.add_argument("input", help="project specs (.csv or .parquet)")
+    parser.add_argument("output", help="results table (.csv or .parquet)")
+    parser.add_argument("--simulations", type=int, default=10000, help="Number_of_simulations per project")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--method", choices=METHODS, default="analytic", help="integration method")
+    parser.add_argument("--k", type=int, default=100000, help="partitions of the numerical integration")
+    args = parser.parse_args(argv)
+
+    specs = read_specs(args.input)
+    write_results(evaluate_portfolio(specs, args.simulations, args.seed, args.method, args.k), args.output)
+
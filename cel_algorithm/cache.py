@@ -0,0 +1,162 @@
+#####################################################################
+# Result cache
+#
+# Memoizes evaluate_project on the canonicalized inputs (project spec,
+# Number_of_simulations, seed, integration method, k and alpha). Results
+# live in a bounded in-memory LRU and, optionally, in a SQLite file so
+# they survive restarts. Only seeded evaluations are cached: without a
+# seed every call is a new random experiment.
+#####################################################################
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from cel_algorithm.evaluation import ProjectResult, evaluate_project
+
+DEFAULT_MAXSIZE = 4096
+
+
+def _sha256(canonical):
+    text = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _canonical_spec(spec):
+    record = spec.to_record()
+    record.pop("name")
+    return record
+
+
+def spec_hash(spec):
+    """
+    SHA-256 of the canonical JSON of a project's inputs (the name is ignored).
+    """
+    return _sha256(_canonical_spec(spec))
+
+
+def cache_key(spec, Number_of_simulations, seed, method="analytic", k=100000, alpha=0.05):
+    """
+    SHA-256 of the canonical JSON of the inputs that determine a result.
+    """
+    canonical = {
+        "spec": _canonical_spec(spec),
+        "Number_of_simulations": int(Number_of_simulations),
+        "seed": int(seed),
+        "method": method,
+        # k only matters for the quadrature methods
+        "k": None if method == "analytic" else int(k),
+        "alpha": float(alpha),
+    }
+    return _sha256(canonical)
+
+
+def _to_float_dict(statistics):
+    return None if statistics is None else {key: float(value) for key, value in statistics.items()}
+
+
+def _dumps(result):
+    return json.dumps({
+        "Number_of_simulations": result.Number_of_simulations,
+        "descriptive": _to_float_dict(result.descriptive),
+        "Low_deficit_probability": result.Low_deficit_probability,
+        "inferential": _to_float_dict(result.inferential),
+        "empirical": _to_float_dict(result.empirical),
+    })
+
+
+def _loads(text, spec):
+    data = json.loads(text)
+    return ProjectResult(spec, data["Number_of_simulations"], data["descriptive"], data["Low_deficit_probability"],
+                         data["inferential"], data["empirical"])
+
+
+class ResultCache:
+    """
+    LRU cache of evaluation results with an optional SQLite store at path.
+
+    Entries are kept serialized, so cached results are independent copies
+    and the NPV sample is never stored. hits and misses count lookups.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, path=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._connection.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, text):
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key, spec):
+        """
+        Cached ProjectResult for key (rebuilt around spec), or None.
+        """
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            elif self._connection is not None:
+                row = self._connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    text = row[0]
+                    self._remember(key, text)
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return _loads(text, spec)
+
+    def put(self, key, result):
+        text = _dumps(result)
+        with self._lock:
+            self._remember(key, text)
+            if self._connection is not None:
+                self._connection.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, text))
+                self._connection.commit()
+
+    def evaluate(self, spec, Number_of_simulations=10000, seed=None, method="analytic", k=100000, alpha=0.05):
+        """
+        evaluation.evaluate_project through the cache (only integer seeds are cached).
+        """
+        if not isinstance(seed, (int, np.integer)):
+            return evaluate_project(spec, Number_of_simulations, seed, method, k, alpha)
+        key = cache_key(spec, Number_of_simulations, seed, method, k, alpha)
+        result = self.get(key, spec)
+        if result is None:
+            result = evaluate_project(spec, Number_of_simulations, seed, method, k, alpha)
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        """
+        Empties the in-memory LRU and resets the counters (the SQLite store is kept).
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
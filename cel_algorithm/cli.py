@@ -0,0 +1,114 @@
+#####################################################################
+# Interactive command-line interface
+#
+# The input() prompts and print() reports of CEL_Algorithm_1.py and
+# CEL_Algorithm_2.py, on top of evaluation.evaluate_project.
+#
+# Usage: python -m cel_algorithm
+#####################################################################
+
+from cel_algorithm.evaluation import evaluate_project
+from cel_algorithm.spec import ProjectSpec
+
+
+def prompt_spec(distribution=None):
+    """
+    Reads a project from standard input and returns (spec, Number_of_simulations, k).
+
+    distribution is "fixed" (one cash-flow triangle for every period, as in
+    CEL_Algorithm_1.py), "adjusted" (one triangle per period) or None to ask.
+    """
+    print("Please enter the following data:")
+
+    Planning_Horizon = int(input("Planning Horizon (number of periods): "))
+    Number_of_simulations = int(input("Number of simulations for Monte Carlo simulation: "))
+
+    print("\nPlease enter the parameters for the triangular distribution of WACC (Weighted Average Cost of Capital):")
+    print("Note: Please enter the WACC value as a decimal number. For example, if the WACC is 5%, enter 0.05.")
+    WACC_m = float(input("Minimum WACC value: "))
+    WACC_ml = float(input("Most likely WACC value: "))
+    WACC_M = float(input("Maximum WACC value: "))
+
+    print("\nPlease enter the parameters for the uniform distribution of initial investment (CF_0 - Initial Cash Flow):")
+    CF_0_m = float(input("Minimum CF_0 value: "))
+    CF_0_M = float(input("Maximum CF_0 value: "))
+
+    if distribution is None:
+        print("\nPlease enter if the cash flow will follow a fixed distribution over the project or will be adjusted annually:")
+        distribution = input("Enter 'fixed' for a fixed distribution or 'adjusted' for annually adjusted distribution: ")
+
+    CF_distributions_m = []
+    CF_distributions_ml = []
+    CF_distributions_M = []
+    if distribution.lower() == 'fixed':
+        print("\nPlease enter the parameters for the triangular distribution of cash flow per period:")
+        CF_m = float(input("Minimum cash flow per period value: "))
+        CF_ml = float(input("Most likely cash flow per period value: "))
+        CF_M = float(input("Maximum cash flow per period value: "))
+        CF_distributions_m = [CF_m] * Planning_Horizon
+        CF_distributions_ml = [CF_ml] * Planning_Horizon
+        CF_distributions_M = [CF_M] * Planning_Horizon
+    else:
+        for period in range(Planning_Horizon):
+            print(f"\nPlease enter the parameters for the triangular distribution of cash flow for period {period + 1}:")
+            CF_distributions_m.append(float(input(f"Minimum cash flow value for period {period + 1}: ")))
+            CF_distributions_ml.append(float(input(f"Most likely cash flow value for period {period + 1}: ")))
+            CF_distributions_M.append(float(input(f"Maximum cash flow value for period {period + 1}: ")))
+
+    print("\nPlease enter if residual value:")
+    RV = float(input("Residual value: "))
+
+    # Data for Numerical Integration Modeling
+    k = int(input("\nPlease enter the number of partitions used in numerical integration (suggested value: 100000): "))
+
+    spec = ProjectSpec(Planning_Horizon, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                       CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+    return spec, Number_of_simulations, k
+
+
+def print_statistics(title, statistics):
+    print(f"\n{title}")
+    print("P(NPV < 0):", statistics["Probability_of_Financial_Deficit"])
+    print("VaR5%:", statistics["VaR_5"])
+    print("CVaR5%:", statistics["CVaR_5"])
+    print("CEL:", statistics["CEL"])
+    print("P(NPV < CEL):", statistics["Probability_NPV_less_CEL"])
+    print("P(NPV < CEL | NPV < 0):", statistics["Probability_NPV_less_CEL_given_that_NPV_less_0"])
+    print("VaR deviation:", statistics["VaR_deviation"])
+    print("CVaR deviation:", statistics["CVaR_deviation"])
+    print("CEL deviation:", statistics["CEL_deviation"])
+
+
+def print_result(result):
+    """
+    Prints a ProjectResult in the format of the scripts.
+    """
+    descriptive = result.descriptive
+    print("\nSTATISTICS DESCRIPTIVE")
+    print("Minimum:", descriptive["NPV_minimum"])
+    print("Maximum:", descriptive["NPV_maximum"])
+    print("Range:", descriptive["NPV_range"])
+    print("Mean:", descriptive["NPV_mean"])
+    print("Standard Deviation:", descriptive["NPV_standard_deviation"])
+    print("Coefficient of Variation:", descriptive["NPV_Coefficient_of_variation"])
+    print("Median:", descriptive["NPV_median"])
+
+    if result.Low_deficit_probability:
+        print("The probability of NPV being negative is low (zero). The rest of the program does not apply in this case.")
+        return
+
+    print_statistics("STATISTICS INFERENTIAL", result.inferential)
+    print_statistics("STATISTICS INFERENTIAL (EMPIRICAL)", result.empirical)
+
+
+def main(distribution=None, method="midpoint"):
+    """
+    Prompts for one project, evaluates it and prints the report.
+
+    The default method is the k-partition midpoint rule of the paper.
+    """
+    spec, Number_of_simulations, k = prompt_spec(distribution)
+    result = evaluate_project(spec, Number_of_simulations, method=method, k=k)
+    print_result(result)
+    return result
+
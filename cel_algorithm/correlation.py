@@ -0,0 +1,168 @@
+#####################################################################
+# Correlated cash flows and a stochastic per-period WACC
+#
+# The scripts draw every period's cash flow independently and hold one
+# WACC for the whole horizon. Here the cash-flow uniforms of a run are
+# coupled across periods with a Gaussian copula: they are mapped to normal
+# scores, multiplied by the Cholesky factor of a correlation matrix and
+# mapped back, so each period keeps its triangular distribution. The
+# correlation is either AR(1), corr(t, s) = phi^|t - s| between the normal
+# scores, or a rank (Spearman) correlation matrix, converted to the
+# copula's normal correlation with 2 sin(pi r / 6).
+#
+# Optionally the WACC becomes a path of per-period rates, each
+# triangular(WACC_m, WACC_ml, WACC_M) and coupled the same way, and cash
+# flows are discounted with the cumulative product
+#     d_t = prod_{s <= t} (1 + WACC_s)^-1
+# Everything is computed on the whole simulations x horizon matrix.
+#####################################################################
+
+import numpy as np
+
+from cel_algorithm.evaluation import result_from_sample
+from cel_algorithm.instrumentation import count, stage
+from cel_algorithm.integration import normal_cdf, normal_ppf
+from cel_algorithm.simulation import (
+    CF_0_COLUMN,
+    FIRST_CF_COLUMN,
+    WACC_COLUMN,
+    as_period_array,
+    as_random_source,
+    draw_uniforms,
+    npv_from_draws,
+    npv_from_uniforms,
+    seed_source,
+    triangular_ppf,
+    uniform_ppf,
+)
+
+SCORE_LIMIT = 1e-12  # uniforms are clipped to [SCORE_LIMIT, 1 - SCORE_LIMIT] before the normal scores
+
+
+def ar1_correlation(phi, Planning_Horizon):
+    """
+    AR(1) correlation matrix phi^|t - s| of Planning_Horizon periods.
+    """
+    if not -1 < phi < 1:
+        raise ValueError("the AR(1) coefficient phi must be in (-1, 1)")
+    lags = np.abs(np.subtract.outer(np.arange(Planning_Horizon), np.arange(Planning_Horizon)))
+    return float(phi) ** lags
+
+
+def copula_correlation(correlation, Planning_Horizon):
+    """
+    Normal-score correlation matrix of the copula from an AR(1) coefficient
+    (scalar) or a rank correlation matrix; None stays None (independent periods).
+    """
+    if correlation is None:
+        return None
+    if np.ndim(correlation) == 0:
+        return ar1_correlation(correlation, Planning_Horizon)
+    rank = np.asarray(correlation, dtype=float)
+    if rank.shape != (Planning_Horizon, Planning_Horizon):
+        raise ValueError(f"expected a {Planning_Horizon} x {Planning_Horizon} correlation matrix, got {rank.shape}")
+    if not np.allclose(rank, rank.T) or not np.allclose(np.diag(rank), 1.0) or np.any(np.abs(rank) > 1):
+        raise ValueError("a correlation matrix must be symmetric with a unit diagonal and entries in [-1, 1]")
+    return 2 * np.sin(np.pi * rank / 6)
+
+
+def gaussian_copula(U, correlation):
+    """
+    Couples the columns of the uniform block U with the normal-score correlation
+    matrix correlation; the marginals stay uniform.
+    """
+    try:
+        L = np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        raise ValueError("the correlation matrix must be positive definite") from None
+    with stage("copula"):
+        Z = normal_ppf(np.clip(U, SCORE_LIMIT, 1 - SCORE_LIMIT)) @ L.T
+        return normal_cdf(Z)
+
+
+def wacc_columns(Planning_Horizon):
+    """
+    Columns of the per-period WACC uniforms in an extended block: the WACC of
+    period 1 stays in WACC_COLUMN, periods 2..H follow the cash-flow columns.
+    """
+    extra = FIRST_CF_COLUMN + Planning_Horizon + np.arange(Planning_Horizon - 1)
+    return np.concatenate([[WACC_COLUMN], extra])
+
+
+def correlated_uniforms(Number_of_simulations, Planning_Horizon, CF_correlation=None, WACC_correlation=None,
+                        rng=None):
+    """
+    Uniform block with coupled cash-flow columns and, when WACC_correlation is
+    given, Planning_Horizon - 1 extra WACC columns (see wacc_columns).
+
+    The first Planning_Horizon + 2 columns are drawn exactly as draw_uniforms
+    does before coupling, so the same seed gives common random numbers with
+    the independent model.
+    """
+    rng = as_random_source(rng)
+    U = draw_uniforms(Number_of_simulations, Planning_Horizon, rng)
+    CF_copula = copula_correlation(CF_correlation, Planning_Horizon)
+    if CF_copula is not None:
+        U[:, FIRST_CF_COLUMN:] = gaussian_copula(U[:, FIRST_CF_COLUMN:], CF_copula)
+    WACC_copula = copula_correlation(WACC_correlation, Planning_Horizon)
+    if WACC_copula is not None:
+        with stage("draws"):
+            extra = rng.random((Number_of_simulations, Planning_Horizon - 1))
+        count("draws", extra.size)
+        count("bytes", extra.nbytes)
+        U = np.concatenate([U, extra], axis=1)
+        columns = wacc_columns(Planning_Horizon)
+        U[:, columns] = gaussian_copula(U[:, columns], WACC_copula)
+    return U
+
+
+def npv_from_correlated_uniforms(U, Planning_Horizon, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                 CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0):
+    """
+    NPV of every row of a block from correlated_uniforms; blocks without extra
+    WACC columns are discounted with one WACC per row, as in npv_from_uniforms.
+    """
+    if U.shape[1] == Planning_Horizon + FIRST_CF_COLUMN:
+        return npv_from_uniforms(U, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                 CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+    with stage("inverse_cdf"):
+        CF_0 = uniform_ppf(U[:, CF_0_COLUMN], CF_0_m, CF_0_M)
+        WACC = triangular_ppf(U[:, wacc_columns(Planning_Horizon)], WACC_m, WACC_ml, WACC_M)
+        CF = triangular_ppf(U[:, FIRST_CF_COLUMN:FIRST_CF_COLUMN + Planning_Horizon],
+                            as_period_array(CF_distributions_m, Planning_Horizon),
+                            as_period_array(CF_distributions_ml, Planning_Horizon),
+                            as_period_array(CF_distributions_M, Planning_Horizon))
+    with stage("discounting"):
+        discount = np.cumprod(1.0 / (1.0 + WACC), axis=1)
+        NPV = npv_from_draws(CF_0, CF, discount, RV)
+    count("bytes", WACC.nbytes + CF.nbytes + discount.nbytes + NPV.nbytes)
+    return NPV
+
+
+def simulate_npv_correlated(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                            CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0,
+                            CF_correlation=None, WACC_correlation=None, rng=None):
+    """
+    simulation.simulate_npv with cash flows correlated across periods and an
+    optional per-period WACC path.
+
+    CF_correlation and WACC_correlation are None (independent cash flows, one
+    WACC per simulation: the same NPVs as simulate_npv), an AR(1) coefficient
+    or a Planning_Horizon x Planning_Horizon rank correlation matrix.
+    """
+    if Planning_Horizon < 1:
+        raise ValueError("Planning_Horizon must be at least 1")
+    U = correlated_uniforms(Number_of_simulations, Planning_Horizon, CF_correlation, WACC_correlation, rng)
+    return npv_from_correlated_uniforms(U, Planning_Horizon, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                        CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+
+
+def evaluate_project_correlated(spec, Number_of_simulations=10000, CF_correlation=None, WACC_correlation=None,
+                                seed=None, method="analytic", k=100000, alpha=0.05, keep_sample=False):
+    """
+    evaluation.evaluate_project with the correlated input model of simulate_npv_correlated.
+    """
+    rng = seed_source(seed)
+    NPV = simulate_npv_correlated(spec.Planning_Horizon, Number_of_simulations, *spec.simulation_arguments(),
+                                  CF_correlation=CF_correlation, WACC_correlation=WACC_correlation, rng=rng)
+    return result_from_sample(spec, NPV, method, k, alpha, keep_sample)
@@ -0,0 +1,410 @@
+#####################################################################
+# Registry of input distributions
+#
+# The scripts draw CF_0 ~ uniform and WACC and the cash flows ~ triangular.
+# Every input (CF_0, WACC, each period's cash flow and RV) can instead
+# reference any distribution registered here by name, e.g. "pert(40, 50,
+# 55)" or distribution("lognormal", 0.0, 0.25):
+#   uniform(low, high)                        closed form
+#   triangular(left, mode, right)             closed form
+#   normal(mean, sd)                          closed form
+#   truncated_normal(mean, sd, lower, upper)  closed form
+#   lognormal(mu, sigma)                      closed form (parameters of log X)
+#   pert(minimum, mode, maximum, lamb=4)      Beta-PERT, lookup table
+#   empirical(x1, x2, ...)                    sample quantiles, lookup table
+#   histogram([edges], [counts])              piecewise-linear CDF, lookup table
+# Every distribution maps uniforms through a vectorized inverse CDF (ppf),
+# so it plugs into the same uniform block as the built-in ones. Besides
+# the exact inverse, each one has a precomputed inverse-CDF table on an
+# equally spaced grid of probabilities: looking it up is an O(1) index
+# and one linear interpolation per draw, which is how the distributions
+# without a closed form sample as fast as the triangular one.
+#####################################################################
+
+import json
+import re
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from cel_algorithm.integration import normal_cdf, normal_ppf
+from cel_algorithm.evaluation import result_from_sample
+from cel_algorithm.instrumentation import count, stage
+from cel_algorithm.simulation import (
+    CF_0_COLUMN,
+    FIRST_CF_COLUMN,
+    WACC_COLUMN,
+    as_random_source,
+    discount_factors,
+    draw_uniforms,
+    npv_from_draws,
+    seed_source,
+    triangular_ppf,
+    uniform_ppf,
+)
+
+TABLE_SIZE = 2 ** 16  # intervals of the inverse-CDF lookup tables
+TABLE_TAIL = 1e-9  # probabilities of the end points of tables of unbounded distributions
+PERT_GRID = 2 ** 18  # intervals of the numerical Beta-PERT CDF
+
+DISTRIBUTIONS = {}
+
+
+def register_distribution(name):
+    """
+    Class decorator adding a Distribution subclass to DISTRIBUTIONS under name.
+    """
+    def decorator(cls):
+        cls.name = name
+        DISTRIBUTIONS[name] = cls
+        return cls
+    return decorator
+
+
+def distribution(name, *parameters, **keyword_parameters):
+    """
+    Instance of the registered distribution name.
+    """
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution {name!r}, expected one of {tuple(DISTRIBUTIONS)}")
+    return DISTRIBUTIONS[name](*parameters, **keyword_parameters)
+
+
+def parse_distribution(text):
+    """
+    Distribution from text such as "pert(40000, 50000, 55000)"; the arguments are JSON values.
+    """
+    match = re.fullmatch(r"\s*(\w+)\s*\((.*)\)\s*", text, re.DOTALL)
+    if match is None:
+        raise ValueError(f"expected name(parameters), got {text!r}")
+    return distribution(match.group(1), *json.loads("[" + match.group(2) + "]"))
+
+
+class InverseCdfTable:
+    """
+    Inverse CDF tabulated at probabilities 0, 1/size, ..., 1 and linearly interpolated.
+    """
+
+    def __init__(self, ppf, size=TABLE_SIZE):
+        self.size = size
+        probabilities = np.linspace(0.0, 1.0, size + 1)
+        probabilities[0], probabilities[-1] = TABLE_TAIL, 1 - TABLE_TAIL
+        self.values = ppf(probabilities)
+
+    def __call__(self, U):
+        position = np.asarray(U, dtype=float) * self.size
+        index = np.minimum(position.astype(np.intp), self.size - 1)
+        fraction = position - index
+        return self.values[index] + fraction * (self.values[index + 1] - self.values[index])
+
+
+class Distribution:
+    """
+    Base class of the registered distributions.
+
+    Subclasses implement exact_ppf; ppf is the lookup table unless the
+    subclass has a closed form as fast as the table.
+    """
+
+    name = None
+
+    def exact_ppf(self, U):
+        raise NotImplementedError
+
+    @cached_property
+    def table(self):
+        return InverseCdfTable(self.exact_ppf)
+
+    def ppf(self, U):
+        return self.table(U)
+
+    def sample(self, size, rng=None):
+        """
+        Vectorized sampler: size draws with the uniforms of rng (see simulation.as_random_source).
+        """
+        return self.ppf(as_random_source(rng).random(size))
+
+
+@register_distribution("uniform")
+@dataclass(frozen=True)
+class Uniform(Distribution):
+    low: float
+    high: float
+
+    def exact_ppf(self, U):
+        return uniform_ppf(U, self.low, self.high)
+
+    ppf = exact_ppf
+
+
+@register_distribution("triangular")
+@dataclass(frozen=True)
+class Triangular(Distribution):
+    left: float
+    mode: float
+    right: float
+
+    def exact_ppf(self, U):
+        return triangular_ppf(U, self.left, self.mode, self.right)
+
+    ppf = exact_ppf
+
+
+@register_distribution("normal")
+@dataclass(frozen=True)
+class Normal(Distribution):
+    mean: float
+    sd: float
+
+    def exact_ppf(self, U):
+        return self.mean + self.sd * normal_ppf(U)
+
+    ppf = exact_ppf
+
+
+@register_distribution("truncated_normal")
+@dataclass(frozen=True)
+class TruncatedNormal(Distribution):
+    mean: float
+    sd: float
+    lower: float = -np.inf
+    upper: float = np.inf
+
+    def __post_init__(self):
+        if not self.lower < self.upper:
+            raise ValueError("truncated normal requires lower < upper")
+
+    def exact_ppf(self, U):
+        low = normal_cdf((self.lower - self.mean) / self.sd)
+        high = normal_cdf((self.upper - self.mean) / self.sd)
+        return np.clip(self.mean + self.sd * normal_ppf(low + U * (high - low)), self.lower, self.upper)
+
+    ppf = exact_ppf
+
+
+@register_distribution("lognormal")
+@dataclass(frozen=True)
+class Lognormal(Distribution):
+    mu: float
+    sigma: float
+
+    @classmethod
+    def from_moments(cls, mean, sd):
+        """
+        Lognormal with the given mean and standard deviation of X.
+        """
+        sigma2 = np.log1p((sd / mean) ** 2)
+        return cls(float(np.log(mean) - sigma2 / 2), float(np.sqrt(sigma2)))
+
+    def exact_ppf(self, U):
+        return np.exp(self.mu + self.sigma * normal_ppf(U))
+
+    ppf = exact_ppf
+
+
+@register_distribution("pert")
+@dataclass(frozen=True)
+class Pert(Distribution):
+    minimum: float
+    mode: float
+    maximum: float
+    lamb: float = 4.0
+
+    def __post_init__(self):
+        if not self.minimum <= self.mode <= self.maximum or self.minimum == self.maximum:
+            raise ValueError("PERT distribution requires minimum <= mode <= maximum and minimum < maximum")
+
+    @cached_property
+    def _cdf(self):
+        # Beta(a, b) CDF on a fine grid of [0, 1] by the trapezoidal rule
+        width = self.maximum - self.minimum
+        a = 1 + self.lamb * (self.mode - self.minimum) / width
+        b = 1 + self.lamb * (self.maximum - self.mode) / width
+        x = np.linspace(0.0, 1.0, PERT_GRID + 1)
+        log_pdf = np.empty_like(x)
+        log_pdf[1:-1] = (a - 1) * np.log(x[1:-1]) + (b - 1) * np.log1p(-x[1:-1])
+        # at an end point the density vanishes unless the mode sits there (a or b == 1)
+        log_pdf[0] = 0.0 if a == 1 else -np.inf
+        log_pdf[-1] = 0.0 if b == 1 else -np.inf
+        pdf = np.exp(log_pdf - np.max(log_pdf))
+        cdf = np.concatenate([[0.0], np.cumsum((pdf[1:] + pdf[:-1]) / 2)])
+        return x, cdf / cdf[-1]
+
+    def exact_ppf(self, U):
+        x, cdf = self._cdf
+        return self.minimum + (self.maximum - self.minimum) * np.interp(U, cdf, x)
+
+
+@register_distribution("empirical")
+class Empirical(Distribution):
+    """
+    Distribution of observed values (e.g. historical cash flows): the inverse
+    CDF interpolates linearly between the sorted observations.
+    """
+
+    def __init__(self, *values):
+        if len(values) == 1 and np.ndim(values[0]) == 1:
+            values = values[0]
+        self.values = np.sort(np.asarray(values, dtype=float))
+        if self.values.size < 2:
+            raise ValueError("an empirical distribution needs at least 2 values")
+
+    def __repr__(self):
+        return f"Empirical(<{self.values.size} values>)"
+
+    def exact_ppf(self, U):
+        return np.interp(np.asarray(U) * (self.values.size - 1), np.arange(self.values.size), self.values)
+
+
+@register_distribution("histogram")
+class Histogram(Distribution):
+    """
+    Histogram with bin edges and counts; uniform within each bin.
+    """
+
+    def __init__(self, edges, counts):
+        self.edges = np.asarray(edges, dtype=float)
+        counts = np.asarray(counts, dtype=float)
+        if self.edges.size != counts.size + 1 or np.any(np.diff(self.edges) <= 0) or np.any(counts < 0):
+            raise ValueError("a histogram needs increasing edges and one non-negative count per bin")
+        self.cdf = np.concatenate([[0.0], np.cumsum(counts)]) / np.sum(counts)
+
+    @classmethod
+    def fit(cls, values, bins=10):
+        """
+        Histogram of observed values (see np.histogram for bins).
+        """
+        counts, edges = np.histogram(values, bins)
+        return cls(edges, counts)
+
+    def __repr__(self):
+        return f"Histogram(<{self.edges.size - 1} bins>)"
+
+    def exact_ppf(self, U):
+        # linear within the non-empty bins only, each with both of its edges; empty bins get no mass
+        Nonempty = np.diff(self.cdf) > 0
+        lower, upper = self.cdf[:-1][Nonempty], self.cdf[1:][Nonempty]
+        left, right = self.edges[:-1][Nonempty], self.edges[1:][Nonempty]
+        U = np.asarray(U, dtype=float)
+        i = np.minimum(np.searchsorted(upper, U, side="left"), upper.size - 1)
+        return left[i] + (U - lower[i]) / (upper[i] - lower[i]) * (right[i] - left[i])
+
+    # a search over the bins is about as fast as the table, which would smear the jumps over empty bins
+    ppf = exact_ppf
+
+
+def as_distribution(value):
+    """
+    Distribution from a Distribution, text such as "pert(1, 2, 3)" or a
+    sequence (name, parameters...).
+    """
+    if isinstance(value, Distribution):
+        return value
+    if isinstance(value, str):
+        return parse_distribution(value)
+    return distribution(*value)
+
+
+@dataclass(frozen=True)
+class InputDistributions:
+    """
+    Distributions of the inputs of one project: CF_0, WACC, the cash flow of
+    every period (tuple of Planning_Horizon) and RV (a Distribution or a constant).
+    """
+
+    CF_0: Distribution
+    WACC: Distribution
+    CF: tuple
+    RV: object = 0.0
+
+    @classmethod
+    def from_spec(cls, spec, CF_0=None, WACC=None, CF=None, RV=None):
+        """
+        The uniform and triangular distributions of a ProjectSpec, with the given
+        inputs replaced (see as_distribution). CF is one distribution for every
+        period or a list with one per period; RV may also be a number.
+        """
+        if CF is None:
+            CF = [Triangular(*parameters) for parameters in
+                  zip(spec.CF_distributions_m, spec.CF_distributions_ml, spec.CF_distributions_M)]
+        elif isinstance(CF, (str, Distribution)):
+            CF = [as_distribution(CF)] * spec.Planning_Horizon
+        else:
+            CF = [as_distribution(value) for value in CF]
+        if len(CF) != spec.Planning_Horizon:
+            raise ValueError(f"expected {spec.Planning_Horizon} cash-flow distributions, got {len(CF)}")
+        if RV is None:
+            RV = spec.RV
+        elif not np.isscalar(RV) or isinstance(RV, str):
+            RV = as_distribution(RV)
+        return cls(Uniform(spec.CF_0_m, spec.CF_0_M) if CF_0 is None else as_distribution(CF_0),
+                   Triangular(spec.WACC_m, spec.WACC_ml, spec.WACC_M) if WACC is None else as_distribution(WACC),
+                   tuple(CF), RV)
+
+    @property
+    def Planning_Horizon(self):
+        return len(self.CF)
+
+
+def cash_flows_from_uniforms(U, CF):
+    """
+    Cash-flow matrix from the uniform columns U (one per period) and the period distributions CF.
+    """
+    if all(isinstance(d, Triangular) for d in CF):
+        # the scripts' case: one broadcast call, identical to simulation.npv_from_uniforms
+        return triangular_ppf(U, np.array([d.left for d in CF]), np.array([d.mode for d in CF]),
+                              np.array([d.right for d in CF]))
+    Cash_flows = np.empty_like(U)
+    for t, d in enumerate(CF):
+        Cash_flows[:, t] = d.ppf(U[:, t])
+    return Cash_flows
+
+
+def npv_from_distributions(U, inputs):
+    """
+    NPV of every row of a uniform block for the given InputDistributions; RV,
+    when random, uses the column after the cash flows.
+    """
+    Planning_Horizon = inputs.Planning_Horizon
+    with stage("inverse_cdf"):
+        CF_0 = inputs.CF_0.ppf(U[:, CF_0_COLUMN])
+        WACC = inputs.WACC.ppf(U[:, WACC_COLUMN])
+        CF = cash_flows_from_uniforms(U[:, FIRST_CF_COLUMN:FIRST_CF_COLUMN + Planning_Horizon], inputs.CF)
+        RV = inputs.RV
+        if isinstance(RV, Distribution):
+            RV = RV.ppf(U[:, FIRST_CF_COLUMN + Planning_Horizon])
+    with stage("discounting"):
+        discount = discount_factors(WACC, Planning_Horizon)
+        NPV = npv_from_draws(CF_0, CF, discount, RV)
+    count("bytes", CF.nbytes + discount.nbytes + NPV.nbytes)
+    return NPV
+
+
+def simulate_npv_distributions(inputs, Number_of_simulations, rng=None):
+    """
+    Generates Number_of_simulations NPV values for the given InputDistributions.
+
+    The uniform block is drawn as in draw_uniforms (plus one column when RV is
+    random), so the distributions of a ProjectSpec give the NPVs of simulate_npv.
+    """
+    rng = as_random_source(rng)
+    U = draw_uniforms(Number_of_simulations, inputs.Planning_Horizon, rng)
+    if isinstance(inputs.RV, Distribution):
+        with stage("draws"):
+            extra = rng.random((Number_of_simulations, 1))
+        count("draws", extra.size)
+        U = np.concatenate([U, extra], axis=1)
+    return npv_from_distributions(U, inputs)
+
+
+def evaluate_project_distributions(spec, Number_of_simulations=10000, seed=None, method="analytic", k=100000,
+                                   alpha=0.05, keep_sample=False, **distributions):
+    """
+    evaluation.evaluate_project with some inputs drawn from other distributions:
+    distributions are the CF_0, WACC, CF and RV keywords of InputDistributions.from_spec.
+    """
+    inputs = InputDistributions.from_spec(spec, **distributions)
+    rng = seed_source(seed)
+    NPV = simulate_npv_distributions(inputs, Number_of_simulations, rng)
+    return result_from_sample(spec, NPV, method, k, alpha, keep_sample)
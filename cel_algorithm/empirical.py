@@ -0,0 +1,74 @@
+#####################################################################
+# Empirical (distribution-free) P(NPV < 0), CEL, VaR and CVaR
+#
+# Computed directly from the simulated NPV sample instead of the fitted
+# normal distribution, so skewed inputs keep their real tails. VaR and
+# CVaR use an O(n) selection (np.partition) rather than a full sort.
+#####################################################################
+
+import numpy as np
+
+
+def empirical_var_cvar(NPV, alpha=0.05):
+    """
+    Returns (VaR_alpha, CVaR_alpha) of an NPV sample.
+
+    VaR_alpha is the ceil(alpha * n)-th smallest NPV and CVaR_alpha the mean
+    of the ceil(alpha * n) smallest NPVs.
+    """
+    NPV = np.asarray(NPV, dtype=float)
+    if not 0 < alpha < 1:
+        raise ValueError("alpha must be in (0, 1)")
+    m = max(int(np.ceil(alpha * NPV.size)), 1)
+    Tail = np.partition(NPV, m - 1)[:m]
+    return Tail[m - 1], np.mean(Tail)
+
+
+def empirical_tail_mean(NPV, threshold=0.0):
+    """
+    Returns (P(NPV < threshold), E[NPV | NPV < threshold]) of an NPV sample.
+
+    The conditional mean is nan when no simulated NPV is below the threshold.
+    """
+    NPV = np.asarray(NPV, dtype=float)
+    Below = NPV[NPV < threshold]
+    if Below.size == 0:
+        return 0.0, np.nan
+    return Below.size / NPV.size, np.mean(Below)
+
+
+def inferential_block(NPV_mean, Probability_of_Financial_Deficit, CEL, Probability_NPV_less_CEL, VaR_5, CVaR_5):
+    """
+    STATISTICS INFERENTIAL dict, keyed as in the scripts, from its six estimates;
+    P(NPV < CEL | NPV < 0) and the deviations from NPV_mean are derived
+    (the conditional probability is nan when P(NPV < 0) = 0).
+    """
+    if Probability_of_Financial_Deficit > 0:
+        Probability_NPV_less_CEL_given_that_NPV_less_0 = Probability_NPV_less_CEL / Probability_of_Financial_Deficit
+    else:
+        Probability_NPV_less_CEL_given_that_NPV_less_0 = np.nan
+
+    return {
+        "Probability_of_Financial_Deficit": Probability_of_Financial_Deficit,
+        "VaR_5": VaR_5,
+        "CVaR_5": CVaR_5,
+        "CEL": CEL,
+        "Probability_NPV_less_CEL": Probability_NPV_less_CEL,
+        "Probability_NPV_less_CEL_given_that_NPV_less_0": Probability_NPV_less_CEL_given_that_NPV_less_0,
+        "VaR_deviation": NPV_mean - VaR_5,
+        "CVaR_deviation": NPV_mean - CVaR_5,
+        "CEL_deviation": NPV_mean - CEL,
+    }
+
+
+def empirical_statistics(NPV, alpha=0.05):
+    """
+    STATISTICS INFERENTIAL estimated from the NPV sample, with the same keys as
+    integration.inferential_statistics (VaR_5 and CVaR_5 hold the alpha level).
+    """
+    NPV = np.asarray(NPV, dtype=float)
+    Probability_of_Financial_Deficit, CEL = empirical_tail_mean(NPV, 0.0)
+    Probability_NPV_less_CEL = np.count_nonzero(NPV < CEL) / NPV.size if Probability_of_Financial_Deficit > 0 else 0.0
+    VaR_5, CVaR_5 = empirical_var_cvar(NPV, alpha)
+    return inferential_block(np.mean(NPV), Probability_of_Financial_Deficit, CEL, Probability_NPV_less_CEL,
+                             VaR_5, CVaR_5)
@@ -0,0 +1,118 @@
+#####################################################################
+# Library API
+#
+# evaluate_project runs the whole CEL algorithm for one ProjectSpec and
+# returns a ProjectResult. It never reads input, prints, exits or touches
+# the global np.random state; the case NPV_mean - 6 * S_NPV > 0, where the
+# scripts stop, is returned as the Low_deficit_probability flag.
+#####################################################################
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from cel_algorithm.empirical import empirical_statistics
+from cel_algorithm.instrumentation import stage
+from cel_algorithm.integration import METHODS, deficit_probability_is_low, inferential_statistics
+from cel_algorithm.sensitivity import project_sensitivities
+from cel_algorithm.simulation import descriptive_statistics, draw_uniforms, npv_from_uniforms, seed_source
+
+INFERENTIAL_KEYS = ("Probability_of_Financial_Deficit", "VaR_5", "CVaR_5", "CEL", "Probability_NPV_less_CEL",
+                    "Probability_NPV_less_CEL_given_that_NPV_less_0", "VaR_deviation", "CVaR_deviation",
+                    "CEL_deviation")
+
+
+@dataclass
+class ProjectResult:
+    """
+    STATISTICS DESCRIPTIVE and STATISTICS INFERENTIAL of one project.
+
+    inferential is the normal-approximation block (None when
+    Low_deficit_probability) and empirical the same block estimated
+    directly from the NPV sample, which is kept only on request, as are the
+    sensitivities ({"descriptive", "inferential", "empirical"} blocks of
+    {statistic: {input: derivative}}, see sensitivity.py).
+    """
+
+    spec: object
+    Number_of_simulations: int
+    descriptive: dict
+    Low_deficit_probability: bool
+    inferential: dict
+    empirical: dict
+    NPV: np.ndarray = field(default=None, repr=False)
+    sensitivities: dict = field(default=None, repr=False)
+
+    def to_record(self):
+        """
+        Flat mapping of the result, one column per statistic (empirical ones prefixed "Empirical_").
+        """
+        record = {
+            "name": self.spec.name,
+            "Planning_Horizon": self.spec.Planning_Horizon,
+            "Number_of_simulations": self.Number_of_simulations,
+        }
+        record.update(self.descriptive)
+        record["Low_deficit_probability"] = self.Low_deficit_probability
+        record.update(self.inferential if self.inferential is not None else dict.fromkeys(INFERENTIAL_KEYS, np.nan))
+        for key, value in self.empirical.items():
+            record["Empirical_" + key] = value
+        return record
+
+
+def result_from_sample(spec, NPV, method="analytic", k=100000, alpha=0.05, keep_sample=False):
+    """
+    Builds the ProjectResult of spec from its simulated NPV sample.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown integration method {method!r}, expected one of {METHODS}")
+    descriptive = descriptive_statistics(NPV)
+    Low_deficit_probability = deficit_probability_is_low(descriptive["NPV_mean"], descriptive["NPV_standard_deviation"])
+    inferential = None
+    if not Low_deficit_probability:
+        inferential = inferential_statistics(descriptive["NPV_mean"], descriptive["NPV_standard_deviation"], method, k)
+    with stage("empirical_statistics"):
+        empirical = empirical_statistics(NPV, alpha)
+    return ProjectResult(spec, len(NPV), descriptive, Low_deficit_probability, inferential, empirical,
+                         NPV if keep_sample else None)
+
+
+def result_from_accumulator(spec, Accumulator, method="analytic", k=100000, alpha=0.05):
+    """
+    Builds the ProjectResult of spec from a streaming.StreamingAccumulator (streaming,
+    parallel or adaptive runs); the median, VaR and CVaR come from its quantile sketch.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown integration method {method!r}, expected one of {METHODS}")
+    descriptive = Accumulator.descriptive_statistics()
+    Low_deficit_probability = deficit_probability_is_low(descriptive["NPV_mean"], descriptive["NPV_standard_deviation"])
+    inferential = None
+    if not Low_deficit_probability:
+        inferential = Accumulator.inferential_statistics(method, k)
+    return ProjectResult(spec, Accumulator.count, descriptive, Low_deficit_probability, inferential,
+                         Accumulator.empirical_statistics(alpha))
+
+
+def evaluate_project(spec, Number_of_simulations=10000, seed=None, method="analytic", k=100000, alpha=0.05,
+                     keep_sample=False, sensitivities=False):
+    """
+    Simulates and evaluates one project.
+
+    seed may be an integer (the same draws as the scripts after
+    np.random.seed(seed)), a RandomState or Generator, or None for fresh entropy.
+    method is the integration method of integration.inferential_statistics.
+    sensitivities=True adds the derivatives of every statistic with respect
+    to every input, computed from the same draws. The stages are timed when
+    instrumentation is enabled (see instrumentation.py).
+    """
+    with stage("evaluate_project", project=spec.name, Number_of_simulations=Number_of_simulations):
+        rng = seed_source(seed)
+        U = draw_uniforms(Number_of_simulations, spec.Planning_Horizon, rng)
+        with stage("npv"):
+            NPV = npv_from_uniforms(U, *spec.simulation_arguments())
+        result = result_from_sample(spec, NPV, method, k, alpha, keep_sample)
+        if sensitivities:
+            with stage("sensitivities"):
+                result.sensitivities = project_sensitivities(spec, U, NPV, result.Low_deficit_probability,
+                                                             method, k, alpha)
+        return result
@@ -0,0 +1,118 @@
+#####################################################################
+# Incremental re-evaluation of what-if edits
+#
+# An IncrementalEvaluation keeps the draws of its last run and the NPV in
+# the terms of sweep.CommonRandomNumbers
+#     NPV = sum_t PV_t - CF_0 + RV * d_H,   PV_t = CF_t * d_t
+# with the per-period discounted contributions PV_t stored column by
+# column. Evaluating an edited spec (same Planning_Horizon) recomputes only
+# what the edit touches, on the same draws:
+#   one period's cash-flow triangle    column t of CF and PV, the PV sum
+#   RV                                 the residual term
+#   CF_0 bounds                        the initial investment
+#   the WACC triangle                  the discounting of every column
+# and then refreshes the statistics from the updated NPV. Results of specs
+# seen before are kept, keyed by spec hash. A new Planning_Horizon draws a
+# new block of uniforms and drops the kept results; Number_of_simulations
+# and the seed are fixed when the IncrementalEvaluation is created.
+#####################################################################
+
+from collections import OrderedDict
+
+import numpy as np
+
+from cel_algorithm.cache import DEFAULT_MAXSIZE, spec_hash
+from cel_algorithm.evaluation import result_from_sample
+from cel_algorithm.simulation import (
+    CF_0_COLUMN,
+    FIRST_CF_COLUMN,
+    WACC_COLUMN,
+    discount_factors,
+    seed_source,
+    triangular_ppf,
+    uniform_ppf,
+)
+from cel_algorithm.sweep import CommonRandomNumbers
+
+CF_FIELDS = ("CF_distributions_m", "CF_distributions_ml", "CF_distributions_M")
+
+
+class IncrementalEvaluation:
+    """
+    Evaluates a sequence of edits of one project on common random numbers.
+
+    evaluate(spec) returns the ProjectResult of spec, updated incrementally
+    from the previous spec; the NPVs equal those of a fresh run on the same
+    draws up to rounding. spec and NPV always follow the last evaluated spec,
+    also when its result comes from the kept results. changed_columns counts
+    the cash-flow columns recomputed by the last evaluate.
+    """
+
+    def __init__(self, spec, Number_of_simulations=10000, seed=None, method="analytic", k=100000, alpha=0.05,
+                 maxsize=DEFAULT_MAXSIZE):
+        self.Number_of_simulations = Number_of_simulations
+        self.method = method
+        self.k = k
+        self.alpha = alpha
+        self.maxsize = maxsize
+        self.rng = seed_source(seed)
+        self.results = OrderedDict()
+        self.changed_columns = 0
+        self._run(spec)
+
+    def _run(self, spec):
+        draws = CommonRandomNumbers(spec, self.Number_of_simulations, self.rng)
+        self.spec = spec
+        self.U, self.CF_0, self.discount, self.CF, self.PV = draws.U, draws.CF_0, draws.discount, draws.CF, draws.PV
+        self.PV_sum = draws.PV_cumulative[:, -1].copy()
+        self.Residual = spec.RV * self.discount[:, -1]
+        self.changed_columns = spec.Planning_Horizon
+        self.results.clear()
+
+    @property
+    def NPV(self):
+        return self.PV_sum - self.CF_0 + self.Residual
+
+    def _update(self, spec):
+        old = self.spec
+        if (spec.WACC_m, spec.WACC_ml, spec.WACC_M) != (old.WACC_m, old.WACC_ml, old.WACC_M):
+            self.discount = discount_factors(triangular_ppf(self.U[:, WACC_COLUMN], spec.WACC_m, spec.WACC_ml,
+                                                            spec.WACC_M), spec.Planning_Horizon)
+            self.PV = self.CF * self.discount
+            self.PV_sum = np.sum(self.PV, axis=1)
+            self.Residual = spec.RV * self.discount[:, -1]
+        elif spec.RV != old.RV:
+            self.Residual = spec.RV * self.discount[:, -1]
+        if (spec.CF_0_m, spec.CF_0_M) != (old.CF_0_m, old.CF_0_M):
+            self.CF_0 = uniform_ppf(self.U[:, CF_0_COLUMN], spec.CF_0_m, spec.CF_0_M)
+
+        periods = [t for t in range(spec.Planning_Horizon)
+                   if any(getattr(spec, field)[t] != getattr(old, field)[t] for field in CF_FIELDS)]
+        for t in periods:
+            self.CF[:, t] = triangular_ppf(self.U[:, FIRST_CF_COLUMN + t], spec.CF_distributions_m[t],
+                                           spec.CF_distributions_ml[t], spec.CF_distributions_M[t])
+            PV_t = self.CF[:, t] * self.discount[:, t]
+            self.PV_sum += PV_t - self.PV[:, t]
+            self.PV[:, t] = PV_t
+        self.changed_columns = len(periods)
+        self.spec = spec
+
+    def evaluate(self, spec=None):
+        """
+        ProjectResult of spec (default: the current spec) on the draws of this run.
+        """
+        if spec is None:
+            spec = self.spec
+        if spec.Planning_Horizon != self.spec.Planning_Horizon:
+            self._run(spec)
+        else:
+            self._update(spec)
+        key = spec_hash(spec)
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+        result = result_from_sample(spec, self.NPV, self.method, self.k, self.alpha)
+        self.results[key] = result
+        while len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+        return result
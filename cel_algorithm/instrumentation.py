@@ -0,0 +1,207 @@
+#####################################################################
+# Instrumentation of the hot path
+#
+# Per-stage wall and CPU timers and counters (uniform draws, bytes of the
+# large arrays allocated, integrand evaluations of the k-partition rules)
+# collected into an InstrumentationStats object. Stages nest, so the five
+# integration passes of inferential_statistics are reported as e.g.
+#     inferential_statistics/P_NPV_less_0_and_CEL/partial_expectation
+# Every stage can also be opened as a span of an OpenTelemetry-style
+# tracer (any object with start_as_current_span(name)).
+#
+# Instrumentation is off unless the environment variable
+# CEL_INSTRUMENTATION is set (to anything but "", "0" or "false") or
+# enable() / instrumented() is called. When off, stage() returns a shared
+# no-op context manager and count() returns at once. Timings cover the
+# current process only; workers of parallel.simulate_npv_parallel are
+# not instrumented. The stage path is kept per thread and per asyncio
+# task, so concurrent stages nest under their own parents, and an
+# instrumented() block only records the stages of its own thread or task
+# (and of the tasks it creates); enable() and disable() switch the
+# process-wide state that applies everywhere else.
+#####################################################################
+
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+ENVIRONMENT_VARIABLE = "CEL_INSTRUMENTATION"
+COUNTERS = ("draws", "bytes", "integration_evaluations")
+
+_NULL_STAGE = nullcontext()
+
+
+@dataclass
+class StageTiming:
+    """
+    Accumulated calls, wall and CPU seconds of one stage.
+    """
+
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+
+@dataclass
+class InstrumentationStats:
+    """
+    Timings per stage path and counters (see COUNTERS).
+    """
+
+    stages: dict = field(default_factory=dict)
+    counters: dict = field(default_factory=lambda: dict.fromkeys(COUNTERS, 0))
+
+    def reset(self):
+        self.stages.clear()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def as_dict(self):
+        """
+        Plain nested dict, ready for json.dumps.
+        """
+        return {
+            "stages": {path: vars(timing).copy() for path, timing in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def report(self):
+        """
+        Text table of the stages (in order of first use) and counters.
+        """
+        width = max([len(path) for path in self.stages] + [len(counter) for counter in COUNTERS])
+        lines = [f"{'stage':<{width}} {'calls':>8} {'wall s':>12} {'cpu s':>12}"]
+        for path, timing in self.stages.items():
+            lines.append(f"{path:<{width}} {timing.calls:>8} {timing.wall_seconds:>12.6f} {timing.cpu_seconds:>12.6f}")
+        lines += [f"{counter:<{width}} {value:>8}" for counter, value in self.counters.items()]
+        return "\n".join(lines)
+
+
+@dataclass
+class _State:
+    enabled: bool
+    tracer: object = None
+    stats: InstrumentationStats = field(default_factory=InstrumentationStats)
+
+
+_global = _State(os.environ.get(ENVIRONMENT_VARIABLE, "").strip().lower() not in ("", "0", "false"))
+_scope = ContextVar("cel_instrumentation_scope", default=None)  # _State of the enclosing instrumented()
+_path = ContextVar("cel_instrumentation_path", default=())
+_lock = threading.Lock()  # guards the shared stats against concurrent updates
+
+
+def _state():
+    state = _scope.get()
+    return _global if state is None else state
+
+
+class _Stage:
+    """
+    Times one stage and records it under its nested path.
+    """
+
+    __slots__ = ("name", "attributes", "state", "span", "timing", "token", "wall", "cpu")
+
+    def __init__(self, name, attributes, state):
+        self.name = name
+        self.attributes = attributes
+        self.state = state
+        self.span = None
+
+    def __enter__(self):
+        path = _path.get() + (self.name,)
+        self.token = _path.set(path)
+        path = "/".join(path)
+        with _lock:
+            self.timing = self.state.stats.stages.setdefault(path, StageTiming())
+        if self.state.tracer is not None:
+            self.span = self.state.tracer.start_as_current_span(self.name)
+            span = self.span.__enter__()
+            for key, value in self.attributes.items():
+                span.set_attribute(key, value)
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        _path.reset(self.token)
+        with _lock:
+            self.timing.calls += 1
+            self.timing.wall_seconds += wall
+            self.timing.cpu_seconds += cpu
+        if self.span is not None:
+            self.span.__exit__(*exc_info)
+        return False
+
+
+def stage(name, **attributes):
+    """
+    Context manager timing the enclosed block as stage name (nested under
+    the enclosing stages); attributes are set on the tracer span, if any.
+    """
+    state = _state()
+    if not state.enabled:
+        return _NULL_STAGE
+    return _Stage(name, attributes, state)
+
+
+def count(counter, amount=1):
+    """
+    Adds amount to one of the COUNTERS.
+    """
+    state = _state()
+    if state.enabled:
+        with _lock:
+            state.stats.counters[counter] += amount
+
+
+def enable(tracer=None):
+    """
+    Turns instrumentation on process-wide, optionally emitting spans to tracer.
+    """
+    _global.enabled = True
+    _global.tracer = tracer
+
+
+def disable():
+    _global.enabled = False
+    _global.tracer = None
+
+
+def is_enabled():
+    return _state().enabled
+
+
+def get_stats():
+    """
+    The InstrumentationStats collected so far (those of the enclosing instrumented() block, if any).
+    """
+    return _state().stats
+
+
+@contextmanager
+def instrumented(tracer=None):
+    """
+    Enables instrumentation for the enclosed block and yields a fresh
+    InstrumentationStats filled by it. The block is scoped to the current
+    thread or asyncio task, so overlapping blocks in other threads or tasks
+    keep their own stats; the previous state is restored afterwards.
+    """
+    state = _State(True, tracer)
+    token = _scope.set(state)
+    try:
+        yield state.stats
+    finally:
+        _scope.reset(token)
+
+
+def opentelemetry_tracer(name="cel_algorithm"):
+    """
+    Tracer of the configured OpenTelemetry SDK, for enable(tracer=...) or instrumented(tracer=...).
+    """
+    from opentelemetry import trace  # optional dependency, only needed for OpenTelemetry spans
+    return trace.get_tracer(name)
@@ -0,0 +1,77 @@
+#####################################################################
+# Multi-core Monte Carlo Simulation of the NPV
+#
+# Number_of_simulations is split across a process pool. Every worker gets
+# its own np.random.Generator spawned from one master SeedSequence, runs
+# the streaming simulation and returns its StreamingAccumulator; the
+# accumulators are merged in worker order, so the results are
+# bit-reproducible for a given master seed and number of workers.
+#####################################################################
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cel_algorithm.streaming import DEFAULT_CHUNK_SIZE, DEFAULT_COMPRESSION, StreamingAccumulator, simulate_npv_streaming
+
+BIT_GENERATORS = {
+    "PCG64": np.random.PCG64,
+    "PCG64DXSM": np.random.PCG64DXSM,
+    "Philox": np.random.Philox,
+}
+
+
+def spawn_generators(seed, workers, bit_generator="PCG64"):
+    """
+    Returns one independent np.random.Generator per worker, spawned from SeedSequence(seed).
+    """
+    if bit_generator not in BIT_GENERATORS:
+        raise ValueError(f"unknown bit generator {bit_generator!r}, expected one of {tuple(BIT_GENERATORS)}")
+    return [np.random.Generator(BIT_GENERATORS[bit_generator](child))
+            for child in np.random.SeedSequence(seed).spawn(workers)]
+
+
+def split_simulations(Number_of_simulations, workers):
+    """
+    Number of simulations of each worker; the first ones take the remainder.
+    """
+    base, remainder = divmod(Number_of_simulations, workers)
+    return [base + (i < remainder) for i in range(workers)]
+
+
+def _simulate_worker(args):
+    (Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+     CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV, rng, chunk_size, compression) = args
+    return simulate_npv_streaming(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                  CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV, rng,
+                                  chunk_size, compression)
+
+
+def simulate_npv_parallel(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                          CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0, seed=None,
+                          workers=None, chunk_size=DEFAULT_CHUNK_SIZE, compression=DEFAULT_COMPRESSION,
+                          bit_generator="PCG64"):
+    """
+    Runs the streaming simulation on workers processes and returns the merged StreamingAccumulator.
+
+    workers defaults to os.cpu_count(); workers=1 runs in the calling process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, Number_of_simulations))
+    Tasks = [(Planning_Horizon, n, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+              CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV, rng, chunk_size, compression)
+             for n, rng in zip(split_simulations(Number_of_simulations, workers),
+                               spawn_generators(seed, workers, bit_generator))]
+
+    if workers == 1:
+        Results = [_simulate_worker(Tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            Results = list(executor.map(_simulate_worker, Tasks))
+
+    Accumulator = StreamingAccumulator(compression)
+    for Result in Results:
+        Accumulator.merge(Result)
+    return Accumulator
@@ -0,0 +1,132 @@
+#####################################################################
+# Importance sampling of a rare financial deficit
+#
+# When NPV_mean is many standard deviations above 0, plain Monte Carlo
+# sees almost no negative NPVs. Here every input uniform (CF_0, WACC and
+# each period's cash flow) is drawn from an exponentially tilted density
+#     g(u) = theta * exp(theta * u) / (exp(theta) - 1)  on [0, 1]
+# and mapped through the usual inverse CDFs, which pushes CF_0 and WACC
+# up and the cash flows down when the tilts are tuned for the loss
+# region. Each draw is reweighted with the likelihood ratio 1 / prod g(u).
+# The tilts are tuned with the multi-level cross-entropy method.
+#####################################################################
+
+import numpy as np
+
+from cel_algorithm.simulation import FIRST_CF_COLUMN, as_random_source, npv_from_uniforms
+
+THETA_LIMIT = 500.0
+
+
+def tilted_uniforms(theta, Number_of_simulations, rng=None):
+    """
+    Draws uniforms from the tilted densities with parameters theta (one per column).
+
+    Returns (U, log_weights) with log_weights = -sum log g(u), the log
+    likelihood ratio of the plain uniform design.
+    """
+    theta = np.asarray(theta, dtype=float)
+    V = as_random_source(rng).random((Number_of_simulations, theta.size))
+    tilted = np.abs(theta) > 1e-12
+    safe = np.where(tilted, theta, 1.0)
+    U = np.where(tilted, np.log1p(V * np.expm1(safe)) / safe, V)
+    U = np.clip(U, 0.0, 1.0)
+    log_density = np.where(tilted, np.log(safe / np.expm1(safe)) + safe * U, 0.0)
+    return U, -np.sum(log_density, axis=1)
+
+
+def tilted_mean(theta):
+    """
+    Mean of the tilted density g on [0, 1] (0.5 for theta = 0).
+    """
+    theta = np.asarray(theta, dtype=float)
+    small = np.abs(theta) < 1e-6
+    safe = np.where(small, 1.0, theta)
+    return np.where(small, 0.5 + theta / 12, -1.0 / np.expm1(-safe) - 1.0 / safe)
+
+
+def theta_for_mean(target):
+    """
+    Tilt whose density has the given mean (vectorized bisection).
+    """
+    target = np.clip(np.asarray(target, dtype=float), 1e-3, 1 - 1e-3)
+    low = np.full(target.shape, -THETA_LIMIT)
+    high = np.full(target.shape, THETA_LIMIT)
+    for _ in range(80):
+        middle = (low + high) / 2
+        below = tilted_mean(middle) < target
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+    return (low + high) / 2
+
+
+def cross_entropy_tilt(Planning_Horizon, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                       CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0,
+                       pilot_size=10000, rho=0.1, max_iterations=30, rng=None):
+    """
+    Tunes the tilts toward {NPV < 0} with the multi-level cross-entropy method.
+
+    Each iteration lowers the level gamma to the rho-quantile of the pilot NPVs
+    (never below 0) and matches the tilted means to the likelihood-weighted
+    means of the uniforms of the draws below gamma.
+    """
+    rng = as_random_source(rng)
+    theta = np.zeros(Planning_Horizon + FIRST_CF_COLUMN)
+    for _ in range(max_iterations):
+        U, log_weights = tilted_uniforms(theta, pilot_size, rng)
+        NPV = npv_from_uniforms(U, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+        gamma = max(0.0, float(np.quantile(NPV, rho)))
+        Elite = NPV <= gamma
+        weights = np.exp(log_weights[Elite] - np.max(log_weights[Elite]))
+        theta = theta_for_mean(weights @ U[Elite] / np.sum(weights))
+        if gamma == 0.0:
+            break
+    return theta
+
+
+def deficit_importance_sampling(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0,
+                                theta=None, rng=None, **cross_entropy_options):
+    """
+    Importance-sampling estimates of P(NPV < 0), CEL, P(NPV < CEL) and
+    P(NPV < CEL | NPV < 0), with the relative errors of the probabilities,
+    the effective sample size below 0 and the tilts used (tuned by
+    cross_entropy_tilt when theta is None).
+    """
+    rng = as_random_source(rng)
+    arguments = (WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                 CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+    if theta is None:
+        theta = cross_entropy_tilt(Planning_Horizon, *arguments, rng=rng, **cross_entropy_options)
+    U, log_weights = tilted_uniforms(theta, Number_of_simulations, rng)
+    NPV = npv_from_uniforms(U, *arguments)
+    weights = np.exp(log_weights)
+
+    def probability(event):
+        terms = weights * event
+        estimate = np.mean(terms)
+        relative_error = np.std(terms) / np.sqrt(Number_of_simulations) / estimate if estimate > 0 else np.nan
+        return estimate, relative_error
+
+    Below = NPV < 0
+    Probability_of_Financial_Deficit, Relative_error_deficit = probability(Below)
+    if Probability_of_Financial_Deficit > 0:
+        CEL = np.sum(weights[Below] * NPV[Below]) / np.sum(weights[Below])
+    else:
+        CEL = np.nan
+    Probability_NPV_less_CEL, Relative_error_less_CEL = probability(NPV < CEL)
+
+    return {
+        "Probability_of_Financial_Deficit": Probability_of_Financial_Deficit,
+        "CEL": CEL,
+        "Probability_NPV_less_CEL": Probability_NPV_less_CEL,
+        "Probability_NPV_less_CEL_given_that_NPV_less_0": (Probability_NPV_less_CEL / Probability_of_Financial_Deficit
+                                                           if Probability_of_Financial_Deficit > 0 else np.nan),
+        "Relative_error_Probability_of_Financial_Deficit": Relative_error_deficit,
+        "Relative_error_Probability_NPV_less_CEL": Relative_error_less_CEL,
+        # effective number of draws behind the estimates in the deficit region
+        "Effective_sample_size": (np.sum(weights[Below]) ** 2 / np.sum(weights[Below] ** 2)
+                                  if Probability_of_Financial_Deficit > 0 else 0.0),
+        "theta": theta,
+    }
@@ -0,0 +1,148 @@
+#####################################################################
+# Multi-level risk profile
+#
+# VaR_alpha and CVaR_alpha for a vector of alphas, and P(NPV < c), the
+# conditional expected loss CEL_c = E[NPV | NPV < c] and P(NPV < CEL_c)
+# for a vector of thresholds c (c = 0 is the CEL of the paper), all in
+# one pass:
+#   empirical   one selection and sort of the lower tail of the sample and
+#               its cumulative sums; every level is an index into them
+#   normal      vectorized partial moments of the normal NPV over
+#               [NPV_mean - 6 * NPV_standard_deviation, b] ("analytic"),
+#               or one cumulative k-partition midpoint pass shared by all
+#               upper limits ("midpoint")
+# so a 100-point risk curve costs about as much as one point. Unlike
+# integration.inferential_statistics, whose VaR_5 uses z = 1.645 as in
+# the paper, the normal VaR_alpha uses the exact normal quantile.
+#####################################################################
+
+import numpy as np
+
+from cel_algorithm.integration import LOWER_LIMIT_SIGMAS, normal_cdf, normal_pdf, normal_ppf
+
+PROFILE_METHODS = ("analytic", "midpoint")
+DEFAULT_ALPHAS = (0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+def _as_levels(values, name):
+    values = np.atleast_1d(np.asarray(values, dtype=float))
+    if values.ndim != 1:
+        raise ValueError(f"{name} must be a scalar or a 1-D sequence")
+    return values
+
+
+def _alphas(alphas):
+    alphas = _as_levels(alphas, "alphas")
+    if np.any((alphas <= 0) | (alphas >= 1)):
+        raise ValueError("alpha must be in (0, 1)")
+    return alphas
+
+
+def _profile(alphas, VaR, CVaR, thresholds, Probability_below, CEL, Probability_NPV_less_CEL):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        conditional = np.where(Probability_below > 0, Probability_NPV_less_CEL / Probability_below, np.nan)
+    return {
+        "alpha": alphas,
+        "VaR": VaR,
+        "CVaR": CVaR,
+        "threshold": thresholds,
+        "Probability_NPV_less_threshold": Probability_below,
+        "CEL": CEL,
+        "Probability_NPV_less_CEL": Probability_NPV_less_CEL,
+        "Probability_NPV_less_CEL_given_that_NPV_less_threshold": conditional,
+    }
+
+
+def sorted_tail_profile(Tail, Number_of_simulations, alphas=DEFAULT_ALPHAS, thresholds=(0.0,)):
+    """
+    Risk profile from the sorted lower tail of a sample of Number_of_simulations
+    NPVs. Tail must hold at least the ceil(max(alphas) * n) smallest values and
+    every value below max(thresholds).
+    """
+    alphas = _alphas(alphas)
+    thresholds = _as_levels(thresholds, "thresholds")
+    n = Number_of_simulations
+    cumulative = np.concatenate([[0.0], np.cumsum(Tail)])
+
+    sizes = np.maximum(np.ceil(alphas * n).astype(int), 1)
+    VaR = Tail[sizes - 1]
+    CVaR = cumulative[sizes] / sizes
+
+    below = np.searchsorted(Tail, thresholds, side="left")  # number of NPV < c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        CEL = np.where(below > 0, cumulative[below] / below, np.nan)
+    Probability_NPV_less_CEL = np.where(below > 0, np.searchsorted(Tail, CEL, side="left"), 0) / n
+    return _profile(alphas, VaR, CVaR, thresholds, below / n, CEL, Probability_NPV_less_CEL)
+
+
+def empirical_risk_profile(NPV, alphas=DEFAULT_ALPHAS, thresholds=(0.0,)):
+    """
+    VaR/CVaR for every alpha and P(NPV < c), CEL_c and P(NPV < CEL_c) for every
+    threshold c, from the NPV sample (definitions as empirical.empirical_statistics).
+
+    Returns a dict of arrays: "alpha", "VaR", "CVaR", "threshold",
+    "Probability_NPV_less_threshold", "CEL", "Probability_NPV_less_CEL" and
+    "Probability_NPV_less_CEL_given_that_NPV_less_threshold".
+    """
+    NPV = np.asarray(NPV, dtype=float)
+    alphas = _alphas(alphas)
+    thresholds = _as_levels(thresholds, "thresholds")
+    m = max(int(np.ceil(alphas.max() * NPV.size)), 1)
+    if thresholds.size:
+        m = max(m, int(np.count_nonzero(NPV < thresholds.max())))
+    Tail = np.sort(np.partition(NPV, m - 1)[:m]) if m < NPV.size else np.sort(NPV)
+    return sorted_tail_profile(Tail, NPV.size, alphas, thresholds)
+
+
+def normal_partial_moments(upper, NPV_mean, NPV_standard_deviation, method="analytic", k=100000):
+    """
+    Vectorized (probability, partial_expectation) of the normal NPV over
+    [NPV_mean - 6 * NPV_standard_deviation, upper] for an array of upper limits,
+    as integration.normal_tail_integrals.
+    """
+    upper = np.asarray(upper, dtype=float)
+    lower = NPV_mean - LOWER_LIMIT_SIGMAS * NPV_standard_deviation
+    if method == "analytic":
+        z_lower = -LOWER_LIMIT_SIGMAS
+        z_upper = np.maximum((upper - NPV_mean) / NPV_standard_deviation, z_lower)
+        probability = normal_cdf(z_upper) - normal_cdf(z_lower)
+        density = np.exp(-0.5 * z_upper ** 2) - np.exp(-0.5 * z_lower ** 2)
+        partial_expectation = NPV_mean * probability - NPV_standard_deviation * density / np.sqrt(2 * np.pi)
+        return probability, partial_expectation
+    if method == "midpoint":
+        # k partitions of [lower, max(upper)], cumulative sums read at every upper limit;
+        # limits at or below lower have empty integrals
+        top = np.max(upper, initial=lower)
+        if top == lower:
+            return np.zeros_like(upper), np.zeros_like(upper)
+        Delta = (top - lower) / k
+        Midpoints = lower + (np.arange(k) + 0.5) * Delta
+        pdf = normal_pdf(Midpoints, NPV_mean, NPV_standard_deviation) * Delta
+        cumulative_probability = np.concatenate([[0.0], np.cumsum(pdf)])
+        cumulative_expectation = np.concatenate([[0.0], np.cumsum(Midpoints * pdf)])
+        position = np.clip((upper - lower) / Delta, 0, k)
+        return (np.interp(position, np.arange(k + 1), cumulative_probability),
+                np.interp(position, np.arange(k + 1), cumulative_expectation))
+    raise ValueError(f"unknown profile method {method!r}, expected one of {PROFILE_METHODS}")
+
+
+def normal_risk_profile(NPV_mean, NPV_standard_deviation, alphas=DEFAULT_ALPHAS, thresholds=(0.0,),
+                        method="analytic", k=100000):
+    """
+    empirical_risk_profile of the normal NPV with the given moments, with the
+    integrals of integration.inferential_statistics evaluated for all levels at once.
+    """
+    alphas = _alphas(alphas)
+    thresholds = _as_levels(thresholds, "thresholds")
+    VaR = NPV_mean + NPV_standard_deviation * normal_ppf(alphas)
+    Probability_below, Partial_expectation = normal_partial_moments(
+        np.concatenate([VaR, thresholds]), NPV_mean, NPV_standard_deviation, method, k)
+    CVaR = Partial_expectation[:alphas.size] / Probability_below[:alphas.size]
+    Probability_below = Probability_below[alphas.size:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        CEL = np.where(Probability_below > 0, Partial_expectation[alphas.size:] / Probability_below, np.nan)
+    Probability_NPV_less_CEL = np.where(
+        Probability_below > 0,
+        normal_partial_moments(np.nan_to_num(CEL, nan=NPV_mean), NPV_mean, NPV_standard_deviation, method, k)[0],
+        0.0)
+    return _profile(alphas, VaR, CVaR, thresholds, Probability_below, CEL, Probability_NPV_less_CEL)
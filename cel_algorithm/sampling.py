@@ -0,0 +1,117 @@
+#####################################################################
+# Variance-reduction sampling of the simulation inputs
+#
+# The engine maps a block of uniforms (CF_0, WACC and one column per
+# period, see simulation.draw_uniforms) through the inverse CDFs, so any
+# way of producing the uniforms is a sampling strategy:
+#   random          - plain pseudo-random draws (the scripts)
+#   antithetic      - U and 1 - U in pairs
+#   latin_hypercube - one draw in each of n strata per column, shuffled
+#   sobol           - scrambled Sobol sequence (needs scipy); its balance
+#                     properties hold for powers of 2 only, so other
+#                     sizes are rejected
+# The standard error of each statistic is measured across independent
+# replicates of the chosen design.
+#####################################################################
+
+import numpy as np
+
+from cel_algorithm.empirical import empirical_statistics
+from cel_algorithm.instrumentation import count, stage
+from cel_algorithm.simulation import FIRST_CF_COLUMN, as_random_source, npv_from_uniforms
+
+SAMPLERS = ("random", "antithetic", "latin_hypercube", "sobol")
+
+SAMPLED_KEYS = ("NPV_mean", "Probability_of_Financial_Deficit", "CEL", "Probability_NPV_less_CEL", "VaR_5", "CVaR_5")
+
+
+def _generator(rng):
+    """
+    np.random.Generator for samplers that need one (seeded from rng when it is not a Generator).
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng(int(as_random_source(rng).random() * 2 ** 63))
+
+
+def check_sample_size(Number_of_simulations, sampling):
+    """
+    Raises ValueError when sampling cannot draw a design of Number_of_simulations points.
+    """
+    if sampling not in SAMPLERS:
+        raise ValueError(f"unknown sampling strategy {sampling!r}, expected one of {SAMPLERS}")
+    if sampling == "sobol" and (Number_of_simulations < 1 or Number_of_simulations & (Number_of_simulations - 1)):
+        raise ValueError(f"sobol sampling needs a power-of-2 number of points per design, got {Number_of_simulations}")
+
+
+def sample_uniforms(Number_of_simulations, Planning_Horizon, sampling="random", rng=None):
+    """
+    Uniform block of shape (Number_of_simulations, Planning_Horizon + 2) drawn with the given strategy.
+    """
+    check_sample_size(Number_of_simulations, sampling)
+    with stage("draws", sampling=sampling):
+        U = _design_uniforms(Number_of_simulations, Planning_Horizon, sampling, rng)
+    count("draws", U.size)
+    count("bytes", U.nbytes)
+    return U
+
+
+def _design_uniforms(Number_of_simulations, Planning_Horizon, sampling, rng):
+    dimension = Planning_Horizon + FIRST_CF_COLUMN
+    if sampling == "random":
+        return as_random_source(rng).random((Number_of_simulations, dimension))
+    if sampling == "antithetic":
+        U = as_random_source(rng).random(((Number_of_simulations + 1) // 2, dimension))
+        return np.concatenate([U, 1.0 - U])[:Number_of_simulations]
+    if sampling == "latin_hypercube":
+        source = as_random_source(rng)
+        strata = np.argsort(source.random((Number_of_simulations, dimension)), axis=0)
+        return (strata + source.random((Number_of_simulations, dimension))) / Number_of_simulations
+    if sampling == "sobol":
+        from scipy.stats import qmc  # optional dependency, only needed for Sobol sampling
+        engine = qmc.Sobol(dimension, scramble=True, seed=_generator(rng))
+        return engine.random_base2(int(Number_of_simulations).bit_length() - 1)
+
+
+def simulate_npv_sampled(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                         CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0,
+                         sampling="random", replicates=10, rng=None):
+    """
+    NPV sample of shape (replicates, Number_of_simulations // replicates), one
+    independently randomized design of the sampling strategy per row (with
+    "sobol", Number_of_simulations // replicates must be a power of 2).
+    """
+    size = Number_of_simulations // replicates
+    if size < 2:
+        raise ValueError("Number_of_simulations must be at least twice the number of replicates")
+    check_sample_size(size, sampling)
+    rng = as_random_source(rng)
+    NPV = np.empty((replicates, size))
+    for replicate in range(replicates):
+        U = sample_uniforms(size, Planning_Horizon, sampling, rng)
+        NPV[replicate] = npv_from_uniforms(U, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                           CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+    return NPV
+
+
+def replicate_statistics(NPV, alpha=0.05):
+    """
+    Estimate and standard error of SAMPLED_KEYS from a (replicates, n) NPV sample.
+
+    Returns {key: (estimate, standard_error)}: the estimate uses the pooled
+    sample and the standard error the spread of the per-replicate estimates.
+    """
+    def statistics(sample):
+        values = empirical_statistics(sample, alpha)
+        values["NPV_mean"] = np.mean(sample)
+        return values
+
+    pooled = statistics(NPV.ravel())
+    per_replicate = [statistics(sample) for sample in NPV]
+    result = {}
+    for key in SAMPLED_KEYS:
+        estimates = np.array([values[key] for values in per_replicate], dtype=float)
+        estimates = estimates[~np.isnan(estimates)]
+        standard_error = np.std(estimates, ddof=1) / np.sqrt(estimates.size) if estimates.size > 1 else np.nan
+        result[key] = (pooled[key], standard_error)
+    return result
@@ -0,0 +1,203 @@
+#####################################################################
+# Pathwise sensitivities of the statistics to every input
+#
+# With the uniforms held fixed, every simulated NPV is a differentiable
+# function of the inputs through the inverse CDFs, so its derivative with
+# respect to WACC_m/ml/M, CF_0_m/M, each period's CF_distributions_m/ml/M
+# and RV is computed in the same pass as the NPV (matrix D, one column per
+# input). Derivatives of the statistics follow from D:
+#   means, standard deviation, min/max      pathwise averages
+#   VaR, median (quantiles)                 E[dNPV | NPV = q]
+#   P(NPV < c)                              -f(c) * E[dNPV | NPV = c]
+#   CEL, CVaR (tail means)                  pathwise tail averages
+# where the conditional expectations and the density f are Gaussian
+# kernel estimates. Normal-approximation statistics are differentiated
+# through NPV_mean and NPV_standard_deviation.
+#####################################################################
+
+import numpy as np
+
+from cel_algorithm.integration import inferential_statistics
+from cel_algorithm.simulation import (
+    CF_0_COLUMN,
+    FIRST_CF_COLUMN,
+    WACC_COLUMN,
+    as_period_array,
+    discount_factors,
+    triangular_ppf,
+)
+
+RELATIVE_STEP = 1e-6  # central differences of the normal-approximation statistics in (mean, sd)
+
+
+def triangular_ppf_gradient(U, left, mode, right):
+    """
+    Derivatives (d/dleft, d/dmode, d/dright) of triangular_ppf at fixed U.
+    """
+    left = np.asarray(left, dtype=float)
+    mode = np.asarray(mode, dtype=float)
+    right = np.asarray(right, dtype=float)
+    base = right - left
+    Left_branch = U <= (mode - left) / base
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # x = left + sqrt(U (mode - left) base)
+        s = np.sqrt(U * (mode - left) * base)
+        left_dl = np.where(s > 0, 1 - U * (right + mode - 2 * left) / (2 * s), 1.0)
+        left_dm = np.where(s > 0, U * base / (2 * s), 0.0)
+        left_dr = np.where(s > 0, U * (mode - left) / (2 * s), 0.0)
+        # x = right - sqrt((1 - U) (right - mode) base)
+        s = np.sqrt((1 - U) * (right - mode) * base)
+        right_dl = np.where(s > 0, (1 - U) * (right - mode) / (2 * s), 0.0)
+        right_dm = np.where(s > 0, (1 - U) * base / (2 * s), 0.0)
+        right_dr = np.where(s > 0, 1 - (1 - U) * (2 * right - left - mode) / (2 * s), 1.0)
+    return (np.where(Left_branch, left_dl, right_dl), np.where(Left_branch, left_dm, right_dm),
+            np.where(Left_branch, left_dr, right_dr))
+
+
+def parameter_labels(Planning_Horizon):
+    """
+    Names of the columns of the derivative matrix, in order.
+    """
+    labels = ["WACC_m", "WACC_ml", "WACC_M", "CF_0_m", "CF_0_M"]
+    for field in ("CF_distributions_m", "CF_distributions_ml", "CF_distributions_M"):
+        labels += [f"{field}[{t}]" for t in range(Planning_Horizon)]
+    return labels + ["RV"]
+
+
+def npv_derivatives(U, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                    CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0):
+    """
+    Derivative matrix D of shape (Number_of_simulations, len(parameter_labels)):
+    D[i, j] is the derivative of the NPV of row i of U with respect to input j.
+    """
+    Planning_Horizon = U.shape[1] - FIRST_CF_COLUMN
+    CF_m = as_period_array(CF_distributions_m, Planning_Horizon)
+    CF_ml = as_period_array(CF_distributions_ml, Planning_Horizon)
+    CF_M = as_period_array(CF_distributions_M, Planning_Horizon)
+    WACC = triangular_ppf(U[:, WACC_COLUMN], WACC_m, WACC_ml, WACC_M)
+    CF = triangular_ppf(U[:, FIRST_CF_COLUMN:], CF_m, CF_ml, CF_M)
+    discount = discount_factors(WACC, Planning_Horizon)
+    years = np.arange(1, Planning_Horizon + 1)
+
+    # dNPV/dWACC = -sum t CF_t (1 + WACC)^-(t+1) - H RV (1 + WACC)^-(H+1)
+    dNPV_dWACC = -(np.einsum("ij,ij->i", CF * years, discount) + Planning_Horizon * RV * discount[:, -1]) / (1 + WACC)
+    dWACC = triangular_ppf_gradient(U[:, WACC_COLUMN], WACC_m, WACC_ml, WACC_M)
+    dCF = triangular_ppf_gradient(U[:, FIRST_CF_COLUMN:], CF_m, CF_ml, CF_M)
+
+    U_0 = U[:, CF_0_COLUMN]
+    columns = [dNPV_dWACC * dWACC[0], dNPV_dWACC * dWACC[1], dNPV_dWACC * dWACC[2], -(1 - U_0), -U_0]
+    return np.column_stack(columns + [discount * dCF[0], discount * dCF[1], discount * dCF[2], discount[:, -1]])
+
+
+class _Kernel:
+    """
+    Gaussian kernel estimates of f(c) and E[D | NPV = c] (Silverman bandwidth).
+    """
+
+    def __init__(self, NPV, D, bandwidth=None):
+        self.NPV = NPV
+        self.D = D
+        if bandwidth is None:
+            bandwidth = 1.06 * np.std(NPV) * NPV.size ** -0.2
+        self.bandwidth = bandwidth
+
+    def __call__(self, c):
+        weights = np.exp(-0.5 * ((self.NPV - c) / self.bandwidth) ** 2)
+        total = np.sum(weights)
+        density = total / (self.NPV.size * self.bandwidth * np.sqrt(2 * np.pi))
+        if total == 0:
+            return density, np.zeros(self.D.shape[1])
+        return density, weights @ self.D / total
+
+
+def statistic_sensitivities(NPV, D, labels, alpha=0.05, bandwidth=None):
+    """
+    Derivatives of STATISTICS DESCRIPTIVE and of the empirical STATISTICS
+    INFERENTIAL with respect to every input.
+
+    Returns {statistic: {label: derivative}}; statistics are keyed as in
+    descriptive_statistics and empirical_statistics.
+    """
+    NPV = np.asarray(NPV, dtype=float)
+    n = NPV.size
+    kernel = _Kernel(NPV, D, bandwidth)
+    NPV_mean = np.mean(NPV)
+    NPV_standard_deviation = np.std(NPV)
+    d_mean = np.mean(D, axis=0)
+    d_sd = (NPV - NPV_mean) @ (D - d_mean) / (n * NPV_standard_deviation)
+    gradients = {
+        "NPV_minimum": D[np.argmin(NPV)],
+        "NPV_maximum": D[np.argmax(NPV)],
+        "NPV_mean": d_mean,
+        "NPV_standard_deviation": d_sd,
+        "NPV_median": kernel(np.median(NPV))[1],
+    }
+    gradients["NPV_range"] = gradients["NPV_maximum"] - gradients["NPV_minimum"]
+    gradients["NPV_Coefficient_of_variation"] = 100 * (d_sd * NPV_mean - NPV_standard_deviation * d_mean) / NPV_mean ** 2
+
+    Below = NPV < 0
+    P_0 = np.mean(Below)
+    density_0, conditional_0 = kernel(0.0)
+    d_P_0 = -density_0 * conditional_0
+    gradients["Probability_of_Financial_Deficit"] = d_P_0
+    if P_0 > 0:
+        CEL = np.mean(NPV[Below])
+        # CEL = S / P(NPV < 0) with S = E[NPV 1{NPV < 0}], dS = E[dNPV 1{NPV < 0}]
+        S = np.sum(NPV[Below]) / n
+        d_S = np.sum(D[Below], axis=0) / n
+        d_CEL = (d_S * P_0 - S * d_P_0) / P_0 ** 2
+        P_CEL = np.mean(NPV < CEL)
+        density_CEL, conditional_CEL = kernel(CEL)
+        d_P_CEL = density_CEL * (d_CEL - conditional_CEL)
+        gradients["CEL"] = d_CEL
+        gradients["Probability_NPV_less_CEL"] = d_P_CEL
+        gradients["Probability_NPV_less_CEL_given_that_NPV_less_0"] = (d_P_CEL * P_0 - P_CEL * d_P_0) / P_0 ** 2
+        gradients["CEL_deviation"] = d_mean - d_CEL
+
+    m = max(int(np.ceil(alpha * n)), 1)
+    Tail = np.argpartition(NPV, m - 1)[:m]
+    VaR = NPV[Tail].max()
+    gradients["VaR_5"] = kernel(VaR)[1]
+    gradients["CVaR_5"] = np.mean(D[Tail], axis=0)
+    gradients["VaR_deviation"] = d_mean - gradients["VaR_5"]
+    gradients["CVaR_deviation"] = d_mean - gradients["CVaR_5"]
+
+    return {statistic: dict(zip(labels, values)) for statistic, values in gradients.items()}
+
+
+def inferential_sensitivities(NPV_mean, NPV_standard_deviation, d_mean, d_sd, labels, method="analytic", k=100000):
+    """
+    Derivatives of the normal-approximation STATISTICS INFERENTIAL, by the
+    chain rule through NPV_mean and NPV_standard_deviation (central differences).
+    """
+    h_mean = RELATIVE_STEP * max(abs(NPV_mean), NPV_standard_deviation)
+    h_sd = RELATIVE_STEP * NPV_standard_deviation
+    up = inferential_statistics(NPV_mean + h_mean, NPV_standard_deviation, method, k)
+    down = inferential_statistics(NPV_mean - h_mean, NPV_standard_deviation, method, k)
+    wide = inferential_statistics(NPV_mean, NPV_standard_deviation + h_sd, method, k)
+    narrow = inferential_statistics(NPV_mean, NPV_standard_deviation - h_sd, method, k)
+    d_mean = np.array([d_mean[label] for label in labels])
+    d_sd = np.array([d_sd[label] for label in labels])
+    sensitivities = {}
+    for statistic in up:
+        partial_mean = (up[statistic] - down[statistic]) / (2 * h_mean)
+        partial_sd = (wide[statistic] - narrow[statistic]) / (2 * h_sd)
+        sensitivities[statistic] = dict(zip(labels, partial_mean * d_mean + partial_sd * d_sd))
+    return sensitivities
+
+
+def project_sensitivities(spec, U, NPV, Low_deficit_probability, method="analytic", k=100000, alpha=0.05):
+    """
+    Sensitivities of a project's statistics, grouped like ProjectResult:
+    {"descriptive": ..., "inferential": ..., "empirical": ...}, each {statistic: {label: derivative}}.
+    """
+    labels = parameter_labels(spec.Planning_Horizon)
+    D = npv_derivatives(U, *spec.simulation_arguments())
+    sample = statistic_sensitivities(NPV, D, labels, alpha)
+    descriptive = {statistic: values for statistic, values in sample.items() if statistic.startswith("NPV_")}
+    empirical = {statistic: values for statistic, values in sample.items() if not statistic.startswith("NPV_")}
+    inferential = None
+    if not Low_deficit_probability:
+        inferential = inferential_sensitivities(np.mean(NPV), np.std(NPV), sample["NPV_mean"],
+                                                sample["NPV_standard_deviation"], labels, method, k)
+    return {"descriptive": descriptive, "inferential": inferential, "empirical": empirical}
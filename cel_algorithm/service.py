@@ -0,0 +1,320 @@
+#####################################################################
+# Asynchronous evaluation service
+#
+# A long-lived asyncio server on a Unix socket or loopback TCP, so a
+# front-end pays the interpreter and numpy start-up once instead of per
+# request. The protocol is newline-delimited JSON, one object per line:
+#   {"id": 1, "spec": {...ProjectSpec.to_record() fields...},
+#    "Number_of_simulations": 10000, "seed": 7, "method": "analytic",
+#    "k": 100000, "alpha": 0.05}            -> {"id": 1, "result": {...}}
+#   {"id": 2, "command": "stats"}           -> {"id": 2, "stats": {...}}
+# Results are written back as soon as each one is ready, so responses on
+# one connection may arrive out of order; match them by id.
+#
+# Concurrent requests are micro-batched: the batcher waits up to
+# batch_window seconds (or max_batch requests) after the first one and
+# splits the batch into one chunk per worker process. Seeded requests
+# reproduce evaluate_project; every unseeded request draws from its own
+# stream, spawned from one SeedSequence per chunk, so a result never
+# depends on which other requests happened to share its batch. Within a
+# chunk, the uniform blocks of requests with the same Planning_Horizon and
+# Number_of_simulations are stacked and evaluated in one 3-D pass
+# (batch.group_npv).
+#
+# python -m cel_algorithm serve --unix /tmp/cel.sock
+# python -m cel_algorithm serve --port 8765
+#####################################################################
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cel_algorithm.batch import MAX_BLOCK_ELEMENTS, group_npv
+from cel_algorithm.evaluation import result_from_sample
+from cel_algorithm.integration import METHODS
+from cel_algorithm.simulation import draw_uniforms
+from cel_algorithm.spec import ProjectSpec
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_BATCH_WINDOW = 0.005  # seconds the batcher waits for more requests
+LATENCY_WINDOW = 10000  # latencies kept for the percentiles
+
+
+def parse_request(request):
+    """
+    Validated (spec, Number_of_simulations, seed, method, k, alpha) of a JSON request.
+    """
+    spec = ProjectSpec.from_record(request["spec"])
+    Number_of_simulations = int(request.get("Number_of_simulations", 10000))
+    seed = request.get("seed")
+    method = request.get("method", "analytic")
+    if method not in METHODS:
+        raise ValueError(f"unknown integration method {method!r}, expected one of {METHODS}")
+    if Number_of_simulations < 1:
+        raise ValueError("Number_of_simulations must be at least 1")
+    k, alpha = int(request.get("k", 100000)), float(request.get("alpha", 0.05))
+    if k < 1 or (method == "simpson" and k % 2):
+        raise ValueError("k must be a positive number of partitions (even for Simpson's rule)")
+    if not 0 < alpha < 1:
+        raise ValueError("alpha must be in (0, 1)")
+    return spec, Number_of_simulations, None if seed is None else int(seed), method, k, alpha
+
+
+def _json_value(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else float(value)
+    return value
+
+
+def _request_uniforms(request, stream):
+    # the uniform block of evaluate_project for a seeded request, else one from the request's own stream
+    spec, Number_of_simulations, seed = request[:3]
+    rng = np.random.default_rng(stream) if seed is None else seed
+    return draw_uniforms(Number_of_simulations, spec.Planning_Horizon, rng)
+
+
+def evaluate_batch(requests):
+    """
+    Result records of a batch of parsed requests, in order (runs in a worker process).
+
+    Unseeded requests get independent streams spawned from one fresh SeedSequence.
+    Requests with the same Planning_Horizon and Number_of_simulations are
+    evaluated together, each on its own uniform block. A request that fails
+    gets its exception in its slot instead of a record, so it never fails
+    the other requests of the batch.
+    """
+    streams = np.random.SeedSequence().spawn(len(requests))
+    records = [None] * len(requests)
+    groups = {}
+    for index, (spec, Number_of_simulations, *_) in enumerate(requests):
+        groups.setdefault((spec.Planning_Horizon, Number_of_simulations), []).append(index)
+
+    for (Planning_Horizon, Number_of_simulations), indices in groups.items():
+        block = max(1, MAX_BLOCK_ELEMENTS // (Number_of_simulations * Planning_Horizon))
+        for start in range(0, len(indices), block):
+            block_indices = indices[start:start + block]
+            try:
+                U = np.stack([_request_uniforms(requests[i], streams[i]) for i in block_indices])
+                NPV = group_npv(U, [requests[i][0] for i in block_indices])
+            except Exception as error:
+                for i in block_indices:
+                    records[i] = error
+                continue
+            for p, i in enumerate(block_indices):
+                spec, _, _, method, k, alpha = requests[i]
+                try:
+                    record = result_from_sample(spec, NPV[p], method, k, alpha).to_record()
+                except Exception as error:
+                    records[i] = error
+                    continue
+                records[i] = {key: _json_value(value) for key, value in record.items()}
+    return records
+
+
+def _warm_up():
+    return os.getpid()
+
+
+class EvaluationService:
+    """
+    Micro-batching evaluation server (see the module header for the protocol).
+
+    workers is the size of the process pool (default os.cpu_count());
+    workers=0 evaluates in a thread of the event loop's default executor.
+    """
+
+    def __init__(self, workers=None, max_batch=DEFAULT_MAX_BATCH, batch_window=DEFAULT_BATCH_WINDOW):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.executor = ProcessPoolExecutor(self.workers) if self.workers > 0 else None
+        self.queue = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._batcher = None
+        self._servers = []
+
+    async def start(self):
+        """
+        Starts the batcher and the worker processes.
+        """
+        if self._batcher is not None:
+            return
+        self.queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        if self.executor is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[loop.run_in_executor(self.executor, _warm_up) for _ in range(self.workers)])
+
+    async def start_unix(self, path):
+        await self.start()
+        server = await asyncio.start_unix_server(self._handle_connection, path)
+        self._servers.append(server)
+        return server
+
+    async def start_tcp(self, host="127.0.0.1", port=0):
+        """
+        Listens on host:port (port 0 picks a free port, see server.sockets).
+        """
+        await self.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        self._servers.append(server)
+        return server
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def evaluate(self, request):
+        """
+        Result record of one JSON request (dict), through the batcher.
+        """
+        parsed = parse_request(request)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((parsed, future, time.perf_counter()))
+        return await future
+
+    def stats(self):
+        """
+        Queue depth, requests in flight, counts and latency percentiles in seconds.
+        """
+        latencies = np.array(self.latencies) if self.latencies else np.array([np.nan])
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "latency_p50": _json_value(np.percentile(latencies, 50)),
+            "latency_p99": _json_value(np.percentile(latencies, 99)),
+        }
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            self.in_flight += len(batch)
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        # one chunk per worker, each answered as soon as it is evaluated
+        size = math.ceil(len(batch) / max(1, min(self.workers, len(batch))))
+        await asyncio.gather(*[self._run_chunk(batch[start:start + size]) for start in range(0, len(batch), size)])
+
+    async def _run_chunk(self, chunk):
+        loop = asyncio.get_running_loop()
+        try:
+            records = await loop.run_in_executor(self.executor, evaluate_batch, [item[0] for item in chunk])
+        except Exception as error:
+            records = [error] * len(chunk)
+        now = time.perf_counter()
+        for (_, future, enqueued), record in zip(chunk, records):
+            self.in_flight -= 1
+            self.latencies.append(now - enqueued)
+            if isinstance(record, Exception):
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(record)
+            else:
+                self.completed += 1
+                if not future.done():
+                    future.set_result(record)
+
+    async def _handle_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(message):
+            async with lock:
+                writer.write((json.dumps(message) + "\n").encode("utf-8"))
+                await writer.drain()
+
+        async def answer(request):
+            request_id = request.get("id") if isinstance(request, dict) else None
+            try:
+                if request.get("command") == "stats":
+                    await respond({"id": request_id, "stats": self.stats()})
+                else:
+                    await respond({"id": request_id, "result": await self.evaluate(request)})
+            except (ConnectionError, asyncio.CancelledError):
+                raise
+            except Exception as error:
+                await respond({"id": request_id, "error": f"{type(error).__name__}: {error}"})
+
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as error:
+                    await respond({"id": None, "error": f"invalid JSON: {error}"})
+                    continue
+                task = asyncio.create_task(answer(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+
+async def serve(unix=None, host="127.0.0.1", port=8765, workers=None, max_batch=DEFAULT_MAX_BATCH,
+                batch_window=DEFAULT_BATCH_WINDOW):
+    """
+    Runs an EvaluationService until cancelled.
+    """
+    service = EvaluationService(workers, max_batch, batch_window)
+    server = await (service.start_unix(unix) if unix else service.start_tcp(host, port))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cel_algorithm serve", description="Serve CEL evaluations over a local socket.")
+    parser.add_argument("--unix", help="Unix socket path (instead of TCP)")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (0 evaluates in a thread)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="largest micro-batch")
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW,
+                        help="seconds to wait for more requests after the first of a batch")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.unix, args.host, args.port, args.workers, args.max_batch, args.batch_window))
+    except KeyboardInterrupt:
+        pass
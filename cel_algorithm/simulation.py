@@ -0,0 +1,172 @@
+#####################################################################
+# Vectorized Monte Carlo Simulation of the NPV
+#
+# The original scripts draw CF_0, WACC and every cash flow with one
+# np.random call each. Here all draws of a run are taken from a single
+# block of uniforms and mapped through the inverse CDFs that
+# np.random.uniform and np.random.triangular use internally, so for the
+# same seed the simulated values are identical to the per-draw loop.
+#####################################################################
+
+import numpy as np
+
+from cel_algorithm.instrumentation import count, stage
+
+# Column layout of the uniform block: one row per simulation
+CF_0_COLUMN = 0
+WACC_COLUMN = 1
+FIRST_CF_COLUMN = 2
+
+
+def uniform_ppf(U, low, high):
+    """
+    Maps uniforms U in [0, 1) to a uniform distribution on [low, high),
+    exactly as np.random.uniform does.
+    """
+    return low + (high - low) * U
+
+
+def triangular_ppf(U, left, mode, right):
+    """
+    Inverse CDF of the triangular distribution (left, mode, right), written
+    with the same operations as np.random.triangular so that the results are
+    bit-identical for the same uniforms. Parameters broadcast against U.
+    """
+    left = np.asarray(left, dtype=float)
+    mode = np.asarray(mode, dtype=float)
+    right = np.asarray(right, dtype=float)
+    if np.any(left > mode) or np.any(mode > right) or np.any(left == right):
+        raise ValueError("triangular distribution requires left <= mode <= right and left < right")
+    base = right - left
+    leftbase = mode - left
+    ratio = leftbase / base
+    leftprod = leftbase * base
+    rightprod = (right - mode) * base
+    return np.where(U <= ratio, left + np.sqrt(U * leftprod), right - np.sqrt((1.0 - U) * rightprod))
+
+
+def as_period_array(values, Planning_Horizon):
+    """
+    Returns a per-period parameter (scalar or list of length Planning_Horizon)
+    as a float array of shape (Planning_Horizon,).
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 0:
+        return np.full(Planning_Horizon, float(values))
+    if values.shape != (Planning_Horizon,):
+        raise ValueError(f"expected {Planning_Horizon} per-period values, got {values.shape[0]}")
+    return values
+
+
+def as_random_source(rng=None):
+    """
+    Resolves rng (None, integer seed, RandomState or Generator) to an object
+    with a random(size) method. None is the global np.random state.
+    """
+    if rng is None:
+        return np.random
+    if isinstance(rng, (int, np.integer)):
+        return np.random.RandomState(rng)
+    return rng
+
+
+def seed_source(seed=None):
+    """
+    Random source of an evaluation seed: an integer seed, RandomState or
+    Generator as in as_random_source, but None means fresh entropy (a new
+    np.random.Generator) instead of the global np.random state.
+    """
+    return np.random.default_rng() if seed is None else as_random_source(seed)
+
+
+def draw_uniforms(Number_of_simulations, Planning_Horizon, rng=None):
+    """
+    Draws the uniform block of shape (Number_of_simulations, Planning_Horizon + 2).
+
+    Row i holds, in order, the uniforms consumed by simulation i of the
+    original loop: CF_0, WACC and then one per period. rng may be None (the
+    global np.random state, as in the scripts), an integer seed (equivalent
+    to np.random.seed(seed)), a np.random.RandomState or a np.random.Generator.
+    """
+    with stage("draws"):
+        U = as_random_source(rng).random((Number_of_simulations, Planning_Horizon + FIRST_CF_COLUMN))
+    count("draws", U.size)
+    count("bytes", U.nbytes)
+    return U
+
+
+def discount_factors(WACC, Planning_Horizon):
+    """
+    Discount matrix (1 + WACC)^-t for t = 1..Planning_Horizon, one row per WACC draw.
+    """
+    years = np.arange(1, Planning_Horizon + 1, dtype=float)
+    return (1.0 + np.asarray(WACC, dtype=float))[..., None] ** -years
+
+
+def npv_from_draws(CF_0, CF, discount, RV=0.0):
+    """
+    NPV = sum_t CF_t * d_t - CF_0 + RV * d_H from the draws and the discount
+    factors of every simulation (the last axis is the period; any leading axes).
+    """
+    NPV = np.einsum("...j,...j->...", CF, discount)
+    NPV -= CF_0
+    NPV += RV * discount[..., -1]  # residual value at the end of the horizon
+    return NPV
+
+
+def npv_from_uniforms(U, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                      CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0):
+    """
+    Computes the NPV of every row of a uniform block (see draw_uniforms).
+    """
+    Planning_Horizon = U.shape[1] - FIRST_CF_COLUMN
+    with stage("inverse_cdf"):
+        CF_0 = uniform_ppf(U[:, CF_0_COLUMN], CF_0_m, CF_0_M)
+        WACC = triangular_ppf(U[:, WACC_COLUMN], WACC_m, WACC_ml, WACC_M)
+        CF = triangular_ppf(U[:, FIRST_CF_COLUMN:],
+                            as_period_array(CF_distributions_m, Planning_Horizon),
+                            as_period_array(CF_distributions_ml, Planning_Horizon),
+                            as_period_array(CF_distributions_M, Planning_Horizon))
+    with stage("discounting"):
+        discount = discount_factors(WACC, Planning_Horizon)
+        NPV = npv_from_draws(CF_0, CF, discount, RV)
+    count("bytes", CF.nbytes + discount.nbytes + NPV.nbytes)
+    return NPV
+
+
+def simulate_npv(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                 CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0, rng=None):
+    """
+    Generates Number_of_simulations NPV values in one batched pass.
+
+    CF_0 ~ uniform(CF_0_m, CF_0_M), WACC ~ triangular(WACC_m, WACC_ml, WACC_M)
+    held for the whole horizon, and the cash flow of period t ~ triangular(
+    CF_distributions_m[t], CF_distributions_ml[t], CF_distributions_M[t]).
+    Scalars are accepted for the cash-flow parameters (fixed distribution).
+    """
+    if Planning_Horizon < 1:
+        raise ValueError("Planning_Horizon must be at least 1")
+    U = draw_uniforms(Number_of_simulations, Planning_Horizon, rng)
+    return npv_from_uniforms(U, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                             CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+
+
+def descriptive_statistics(NPV):
+    """
+    STATISTICS DESCRIPTIVE of an NPV sample, keyed by the names used in the scripts.
+    """
+    with stage("descriptive_statistics"):
+        NPV = np.asarray(NPV, dtype=float)
+        NPV_minimum = np.min(NPV)
+        NPV_maximum = np.max(NPV)
+        NPV_mean = np.mean(NPV)
+        NPV_standard_deviation = np.std(NPV)  # S_NPV in paper
+        return {
+            "NPV_minimum": NPV_minimum,
+            "NPV_maximum": NPV_maximum,
+            "NPV_range": NPV_maximum - NPV_minimum,
+            "NPV_mean": NPV_mean,
+            "NPV_standard_deviation": NPV_standard_deviation,
+            "NPV_Coefficient_of_variation": (NPV_standard_deviation / NPV_mean) * 100,
+            "NPV_median": np.median(NPV),
+        }
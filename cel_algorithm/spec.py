@@ -0,0 +1,131 @@
+#####################################################################
+# Project specification
+#
+# The input data of one investment project, with the same names as the
+# input section of the scripts. Cash flows are always stored per period
+# (CF_distributions_m/ml/M, as in CEL_Algorithm_2.py); the fixed
+# distribution of CEL_Algorithm_1.py is the case of equal periods.
+#####################################################################
+
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ProjectSpec:
+    """
+    Input data of one project: WACC ~ triangular(WACC_m, WACC_ml, WACC_M),
+    CF_0 ~ uniform(CF_0_m, CF_0_M), cash flow of period t ~ triangular(
+    CF_distributions_m[t], CF_distributions_ml[t], CF_distributions_M[t])
+    and the residual value RV.
+    """
+
+    Planning_Horizon: int
+    WACC_m: float
+    WACC_ml: float
+    WACC_M: float
+    CF_0_m: float
+    CF_0_M: float
+    CF_distributions_m: tuple
+    CF_distributions_ml: tuple
+    CF_distributions_M: tuple
+    RV: float = 0.0
+    name: str = ""
+
+    def __post_init__(self):
+        # canonical types, so equal specs have equal records and cache keys
+        object.__setattr__(self, "Planning_Horizon", int(self.Planning_Horizon))
+        for field in ("WACC_m", "WACC_ml", "WACC_M", "CF_0_m", "CF_0_M", "RV"):
+            object.__setattr__(self, field, float(getattr(self, field)))
+        if self.Planning_Horizon < 1:
+            raise ValueError("Planning_Horizon must be at least 1")
+        for field in ("CF_distributions_m", "CF_distributions_ml", "CF_distributions_M"):
+            values = tuple(float(value) for value in getattr(self, field))
+            if len(values) != self.Planning_Horizon:
+                raise ValueError(f"{field} must have Planning_Horizon = {self.Planning_Horizon} values, got {len(values)}")
+            object.__setattr__(self, field, values)
+        _check_triangle("WACC", self.WACC_m, self.WACC_ml, self.WACC_M)
+        if not self.CF_0_m < self.CF_0_M:
+            raise ValueError(f"CF_0 requires CF_0_m < CF_0_M, got {self.CF_0_m}, {self.CF_0_M}")
+        for period, triangle in enumerate(zip(self.CF_distributions_m, self.CF_distributions_ml,
+                                              self.CF_distributions_M), 1):
+            _check_triangle(f"cash flow of period {period}", *triangle)
+
+    @classmethod
+    def fixed(cls, Planning_Horizon, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M, CF_m, CF_ml, CF_M, RV=0.0, name=""):
+        """
+        Project whose cash flow follows the same triangular distribution in every period.
+        """
+        return cls(Planning_Horizon, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                   (CF_m,) * Planning_Horizon, (CF_ml,) * Planning_Horizon, (CF_M,) * Planning_Horizon, RV, name)
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Builds a spec from a mapping such as a CSV row.
+
+        Cash flows are given either as CF_m, CF_ml, CF_M (fixed distribution) or as
+        CF_distributions_m/ml/M lists, written as JSON ("[1, 2]") or separated by ";".
+        """
+        Planning_Horizon = int(float(record["Planning_Horizon"]))
+        values = [float(record[field]) for field in ("WACC_m", "WACC_ml", "WACC_M", "CF_0_m", "CF_0_M")]
+        RV = _float_or_default(record.get("RV"), 0.0)
+        name = "" if record.get("name") is None else str(record["name"])
+        if _is_missing(record.get("CF_distributions_m")):
+            return cls.fixed(Planning_Horizon, *values, float(record["CF_m"]), float(record["CF_ml"]),
+                             float(record["CF_M"]), RV, name)
+        return cls(Planning_Horizon, *values, _parse_list(record["CF_distributions_m"]),
+                   _parse_list(record["CF_distributions_ml"]), _parse_list(record["CF_distributions_M"]), RV, name)
+
+    def to_record(self):
+        """
+        Mapping with the same fields as from_record accepts (cash-flow lists as JSON).
+        """
+        return {
+            "name": self.name,
+            "Planning_Horizon": self.Planning_Horizon,
+            "WACC_m": self.WACC_m,
+            "WACC_ml": self.WACC_ml,
+            "WACC_M": self.WACC_M,
+            "CF_0_m": self.CF_0_m,
+            "CF_0_M": self.CF_0_M,
+            "CF_distributions_m": json.dumps(list(self.CF_distributions_m)),
+            "CF_distributions_ml": json.dumps(list(self.CF_distributions_ml)),
+            "CF_distributions_M": json.dumps(list(self.CF_distributions_M)),
+            "RV": self.RV,
+        }
+
+    def simulation_arguments(self):
+        """
+        Positional arguments of simulation.simulate_npv and the other engines, after Number_of_simulations.
+        """
+        return (self.WACC_m, self.WACC_ml, self.WACC_M, self.CF_0_m, self.CF_0_M,
+                self.CF_distributions_m, self.CF_distributions_ml, self.CF_distributions_M, self.RV)
+
+
+def _check_triangle(name, m, ml, M):
+    if not (m <= ml <= M and m < M):
+        raise ValueError(f"{name} requires m <= ml <= M and m < M, got {m}, {ml}, {M}")
+
+
+def _is_missing(value):
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip() == ""
+    return np.ndim(value) == 0 and np.isnan(value)
+
+
+def _float_or_default(value, default):
+    return default if _is_missing(value) else float(value)
+
+
+def _parse_list(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("["):
+            return tuple(float(v) for v in json.loads(value))
+        return tuple(float(v) for v in value.split(";") if v.strip())
+    return tuple(float(v) for v in value)
@@ -0,0 +1,319 @@
+#####################################################################
+# Memory-mapped NPV sample store
+#
+# A simulated NPV sample (and optionally the CF_0, WACC and per-period
+# cash-flow draws behind it) is written chunk by chunk to .npy files in a
+# directory, next to a metadata.json header with the spec, its hash, the
+# seed and the sampler. Opening the store memory-maps the arrays, so CEL
+# at another threshold, VaR/CVaR at other alpha levels or a histogram are
+# recomputed out-of-core, one zero-copy chunk at a time, without
+# re-simulating. Exact tail statistics keep only the ceil(alpha * n)
+# smallest NPVs in memory; the median comes from the quantile sketch.
+#####################################################################
+
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cel_algorithm.cache import spec_hash
+from cel_algorithm.empirical import inferential_block
+from cel_algorithm.evaluation import ProjectResult
+from cel_algorithm.integration import deficit_probability_is_low
+from cel_algorithm.risk_profile import DEFAULT_ALPHAS, sorted_tail_profile
+from cel_algorithm.sampling import check_sample_size, sample_uniforms
+from cel_algorithm.simulation import (
+    CF_0_COLUMN,
+    FIRST_CF_COLUMN,
+    WACC_COLUMN,
+    as_period_array,
+    as_random_source,
+    npv_from_uniforms,
+    triangular_ppf,
+    uniform_ppf,
+)
+from cel_algorithm.spec import ProjectSpec
+from cel_algorithm.streaming import DEFAULT_CHUNK_SIZE, DEFAULT_COMPRESSION, StreamingAccumulator
+
+STORE_VERSION = 1
+METADATA_FILE = "metadata.json"
+NPV_FILE = "NPV.npy"
+DRAW_FILES = {"CF_0": "CF_0.npy", "WACC": "WACC.npy", "CF": "CF.npy"}
+
+
+class _SmallestValues:
+    """
+    The m smallest values of a stream of chunks. Once m values are known,
+    each chunk is first filtered against the m-th smallest so far, and the
+    buffer is partitioned back to m values only when it exceeds 2 * m, so a
+    partition is paid for by at least m new values.
+    """
+
+    def __init__(self, m):
+        self.m = m
+        self.parts = []
+        self.size = 0
+        self.bound = np.inf
+
+    def update(self, NPV):
+        if self.bound < np.inf:
+            NPV = NPV[NPV <= self.bound]
+        self.parts.append(NPV)
+        self.size += NPV.size
+        if self.size > 2 * self.m:
+            self._compress()
+
+    def _compress(self):
+        Tail = np.concatenate(self.parts) if self.parts else np.empty(0)
+        if Tail.size >= self.m:
+            Tail = np.partition(Tail, self.m - 1)[:self.m]
+            self.bound = Tail[-1]
+        self.parts = [Tail]
+        self.size = Tail.size
+
+    def values(self):
+        """
+        The m smallest values seen (all of them when fewer), unsorted.
+        """
+        self._compress()
+        return self.parts[0]
+
+
+def write_npv_store(path, spec, Number_of_simulations, seed=None, sampling="random", keep_draws=False,
+                    chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Simulates spec into a new store at directory path and returns it opened (NpvStore).
+
+    seed is an integer (a RandomState, as evaluation.evaluate_project) or None
+    for a fresh seed, which is recorded. With the "random" sampler the stored
+    NPVs are those of evaluate_project with the same seed. keep_draws also
+    stores CF_0, WACC and the cash flows (matrix of Planning_Horizon columns).
+    Memory is bounded by chunk_size. Every chunk is one design of the sampler,
+    so with "sobol" the chunks (and the last, partial one) must be powers of 2.
+    """
+    for size in {min(chunk_size, Number_of_simulations), Number_of_simulations % chunk_size or chunk_size}:
+        check_sample_size(size, sampling)
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    os.makedirs(path, exist_ok=False)
+    H = spec.Planning_Horizon
+    NPV = np.lib.format.open_memmap(os.path.join(path, NPV_FILE), "w+", np.float64, (Number_of_simulations,))
+    if keep_draws:
+        draws = {
+            "CF_0": np.lib.format.open_memmap(os.path.join(path, DRAW_FILES["CF_0"]), "w+", np.float64,
+                                              (Number_of_simulations,)),
+            "WACC": np.lib.format.open_memmap(os.path.join(path, DRAW_FILES["WACC"]), "w+", np.float64,
+                                              (Number_of_simulations,)),
+            "CF": np.lib.format.open_memmap(os.path.join(path, DRAW_FILES["CF"]), "w+", np.float64,
+                                            (Number_of_simulations, H)),
+        }
+
+    rng = as_random_source(seed)
+    for start in range(0, Number_of_simulations, chunk_size):
+        stop = min(start + chunk_size, Number_of_simulations)
+        U = sample_uniforms(stop - start, H, sampling, rng)
+        NPV[start:stop] = npv_from_uniforms(U, *spec.simulation_arguments())
+        if keep_draws:
+            draws["CF_0"][start:stop] = uniform_ppf(U[:, CF_0_COLUMN], spec.CF_0_m, spec.CF_0_M)
+            draws["WACC"][start:stop] = triangular_ppf(U[:, WACC_COLUMN], spec.WACC_m, spec.WACC_ml, spec.WACC_M)
+            draws["CF"][start:stop] = triangular_ppf(U[:, FIRST_CF_COLUMN:],
+                                                     as_period_array(spec.CF_distributions_m, H),
+                                                     as_period_array(spec.CF_distributions_ml, H),
+                                                     as_period_array(spec.CF_distributions_M, H))
+    NPV.flush()
+    del NPV
+    if keep_draws:
+        for array in draws.values():
+            array.flush()
+        del draws
+
+    metadata = {
+        "version": STORE_VERSION,
+        "spec": spec.to_record(),
+        "spec_hash": spec_hash(spec),
+        "Number_of_simulations": int(Number_of_simulations),
+        "seed": int(seed),
+        "generator": "RandomState",
+        "sampler": sampling,
+        "chunk_size": int(chunk_size),
+        "draws": sorted(DRAW_FILES) if keep_draws else [],
+        "created": datetime.now(timezone.utc).isoformat(),
+    }
+    # written last: a directory without metadata is an incomplete store
+    with open(os.path.join(path, METADATA_FILE), "w") as file:
+        json.dump(metadata, file, indent=2)
+    return NpvStore(path)
+
+
+class NpvStore:
+    """
+    Read-only view of a store written by write_npv_store.
+
+    NPV (and draws()) are memory-mapped arrays; the statistics read them in
+    chunks of chunk_size values.
+    """
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        with open(os.path.join(path, METADATA_FILE)) as file:
+            self.metadata = json.load(file)
+        if self.metadata["version"] != STORE_VERSION:
+            raise ValueError(f"unsupported store version {self.metadata['version']}")
+        self.spec = ProjectSpec.from_record(self.metadata["spec"])
+        self.NPV = np.load(os.path.join(path, NPV_FILE), mmap_mode="r")
+
+    def __len__(self):
+        return self.NPV.shape[0]
+
+    def matches(self, spec):
+        """
+        True when the store was simulated for spec (same inputs, any name).
+        """
+        return spec_hash(spec) == self.metadata["spec_hash"]
+
+    def draws(self):
+        """
+        Memory-mapped draws {"CF_0", "WACC", "CF"}, empty when they were not kept.
+        """
+        return {name: np.load(os.path.join(self.path, DRAW_FILES[name]), mmap_mode="r")
+                for name in self.metadata["draws"]}
+
+    def chunks(self):
+        """
+        Yields the NPV sample as zero-copy slices of at most chunk_size values.
+        """
+        for start in range(0, len(self), self.chunk_size):
+            yield self.NPV[start:start + self.chunk_size]
+
+    def accumulator(self, compression=DEFAULT_COMPRESSION):
+        """
+        streaming.StreamingAccumulator of the stored sample (one pass).
+        """
+        Accumulator = StreamingAccumulator(compression)
+        for NPV in self.chunks():
+            Accumulator.update(NPV)
+        return Accumulator
+
+    def tail_mean(self, threshold=0.0):
+        """
+        Exact (P(NPV < threshold), E[NPV | NPV < threshold]), as empirical.empirical_tail_mean.
+        """
+        count_below = 0
+        sum_below = 0.0
+        for NPV in self.chunks():
+            Below = NPV[NPV < threshold]
+            count_below += Below.size
+            sum_below += float(np.sum(Below))
+        if count_below == 0:
+            return 0.0, np.nan
+        return count_below / len(self), sum_below / count_below
+
+    def probability_below(self, threshold):
+        """
+        Exact P(NPV < threshold).
+        """
+        return sum(int(np.count_nonzero(NPV < threshold)) for NPV in self.chunks()) / len(self)
+
+    def smallest(self, m):
+        """
+        The m smallest stored NPVs (unsorted), keeping at most 2 * m + chunk_size values in memory.
+        """
+        Tail = _SmallestValues(m)
+        for NPV in self.chunks():
+            Tail.update(NPV)
+        return Tail.values()
+
+    def var_cvar(self, alpha=0.05):
+        """
+        Exact (VaR_alpha, CVaR_alpha), as empirical.empirical_var_cvar; alpha may be a
+        sequence, evaluated from one selection of the largest tail.
+        """
+        alphas = np.atleast_1d(np.asarray(alpha, dtype=float))
+        if np.any((alphas <= 0) | (alphas >= 1)):
+            raise ValueError("alpha must be in (0, 1)")
+        sizes = np.maximum(np.ceil(alphas * len(self)).astype(int), 1)
+        Tail = np.sort(self.smallest(int(sizes.max())))
+        cumulative = np.cumsum(Tail)
+        VaR, CVaR = Tail[sizes - 1], cumulative[sizes - 1] / sizes
+        if np.ndim(alpha) == 0:
+            return VaR[0], CVaR[0]
+        return VaR, CVaR
+
+    def risk_profile(self, alphas=DEFAULT_ALPHAS, thresholds=(0.0,)):
+        """
+        risk_profile.empirical_risk_profile of the stored sample, from one
+        selection of the tail covering every level.
+        """
+        m = max(int(np.ceil(np.max(alphas) * len(self))), 1)
+        if np.size(thresholds):
+            m = max(m, round(self.probability_below(np.max(thresholds)) * len(self)))
+        return sorted_tail_profile(np.sort(self.smallest(m)), len(self), alphas, thresholds)
+
+    def histogram(self, bins=50, range=None):
+        """
+        (counts, edges) of the stored sample, as np.histogram.
+        """
+        if range is None:
+            range = (min(float(np.min(NPV)) for NPV in self.chunks()),
+                     max(float(np.max(NPV)) for NPV in self.chunks()))
+        edges = np.histogram_bin_edges(np.empty(0), bins, range)
+        counts = np.zeros(edges.size - 1, dtype=np.int64)
+        for NPV in self.chunks():
+            counts += np.histogram(NPV, edges)[0]
+        return counts, edges
+
+    def empirical_statistics(self, alpha=0.05, threshold=0.0, Accumulator=None):
+        """
+        empirical.empirical_statistics of the stored sample, computed out-of-core;
+        threshold replaces 0 as the loss level of P(NPV < 0) and CEL.
+
+        The mean, the NPVs below threshold and the alpha tail are collected in
+        one pass; P(NPV < CEL) is read from the tail when it holds every loss,
+        else from a second pass. Accumulator (this store's, see accumulator())
+        supplies the mean and, at threshold 0, the loss count and sum, so CEL
+        is known and P(NPV < CEL) is counted in the same single pass.
+        """
+        if not 0 < alpha < 1:
+            raise ValueError("alpha must be in (0, 1)")
+        n = len(self)
+        m = max(int(np.ceil(alpha * n)), 1)
+        Tail = _SmallestValues(m)
+        if Accumulator is not None and threshold == 0:
+            count_below, sum_below = Accumulator.count_below_0, Accumulator.sum_below_0
+            CEL = sum_below / count_below if count_below else np.nan
+            count_below_CEL = 0
+            for NPV in self.chunks():
+                Tail.update(NPV)
+                count_below_CEL += int(np.count_nonzero(NPV < CEL))
+        else:
+            total = count_below = 0
+            sum_below = 0.0
+            for NPV in self.chunks():
+                Below = NPV[NPV < threshold]
+                total += float(np.sum(NPV))
+                count_below += Below.size
+                sum_below += float(np.sum(Below))
+                Tail.update(NPV)
+            CEL = sum_below / count_below if count_below else np.nan
+            if count_below <= m:  # every NPV < threshold, hence every NPV < CEL, is in the tail
+                count_below_CEL = int(np.count_nonzero(Tail.values() < CEL))
+            else:
+                count_below_CEL = sum(int(np.count_nonzero(NPV < CEL)) for NPV in self.chunks())
+        NPV_mean = Accumulator.moments.mean if Accumulator is not None else total / n
+        Tail = Tail.values()
+        return inferential_block(NPV_mean, count_below / n, CEL, count_below_CEL / n, np.max(Tail), np.mean(Tail))
+
+    def result(self, method="analytic", k=100000, alpha=0.05):
+        """
+        ProjectResult of the stored sample: moments exact, median from the
+        quantile sketch, empirical block exact (see empirical_statistics).
+        """
+        Accumulator = self.accumulator()
+        descriptive = Accumulator.descriptive_statistics()
+        Low_deficit_probability = deficit_probability_is_low(descriptive["NPV_mean"],
+                                                             descriptive["NPV_standard_deviation"])
+        inferential = None if Low_deficit_probability else Accumulator.inferential_statistics(method, k)
+        return ProjectResult(self.spec, len(self), descriptive, Low_deficit_probability, inferential,
+                             self.empirical_statistics(alpha, Accumulator=Accumulator))
@@ -0,0 +1,253 @@
+#####################################################################
+# Streaming (constant-memory) Monte Carlo Simulation of the NPV
+#
+# NPVs are generated in blocks of chunk_size simulations and folded into
+# accumulators, so peak memory depends on chunk_size and not on
+# Number_of_simulations:
+#   OnlineMoments   - count, mean, variance (Welford/Chan), min and max
+#   QuantileSketch  - mergeable t-digest style sketch for median, VaR, CVaR
+#   running sums of NPV < 0 for exact P(NPV < 0) and CEL
+# Every accumulator can be merged with another one of the same kind.
+#####################################################################
+
+import math
+
+import numpy as np
+
+from cel_algorithm.empirical import inferential_block
+from cel_algorithm.instrumentation import stage
+from cel_algorithm.integration import inferential_statistics
+from cel_algorithm.simulation import as_random_source, draw_uniforms, npv_from_uniforms
+
+DEFAULT_CHUNK_SIZE = 1000000
+DEFAULT_COMPRESSION = 2000
+
+
+class OnlineMoments:
+    """
+    Running count, mean, sum of squared deviations (M2), minimum and maximum.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.M2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        chunk = OnlineMoments()
+        chunk.count = values.size
+        chunk.mean = float(np.mean(values))
+        chunk.M2 = float(np.sum((values - chunk.mean) ** 2))
+        chunk.minimum = float(np.min(values))
+        chunk.maximum = float(np.max(values))
+        self.merge(chunk)
+
+    def merge(self, other):
+        """
+        Combines the moments of other into self (Chan et al. parallel update).
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.M2 += other.M2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self):
+        """
+        Population variance, as np.var / np.std with ddof=0.
+        """
+        return self.M2 / self.count
+
+    @property
+    def standard_deviation(self):
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch in the style of the merging t-digest.
+
+    The sample is summarised by at most about compression / 2 centroids
+    (mean, count); centroids are smaller in the tails, where VaR and CVaR
+    are read, than around the median.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.counts = np.empty(0)
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    @property
+    def count(self):
+        return float(np.sum(self.counts))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        self.minimum = min(self.minimum, float(np.min(values)))
+        self.maximum = max(self.maximum, float(np.max(values)))
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.counts, np.ones(values.size)]))
+
+    def merge(self, other):
+        if other.means.size == 0:
+            return
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._compress(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.counts, other.counts]))
+
+    def _compress(self, means, counts):
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        counts = counts[order]
+        total = np.sum(counts)
+        q = (np.cumsum(counts) - counts / 2) / total
+        # k-scale k(q) = compression / (2 pi) * asin(2q - 1): one centroid per unit of k
+        group = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)).astype(np.int64)
+        group -= group[0]
+        new_counts = np.bincount(group, weights=counts)
+        new_sums = np.bincount(group, weights=means * counts)
+        keep = new_counts > 0
+        self.counts = new_counts[keep]
+        self.means = new_sums[keep] / self.counts
+
+    def _knots(self):
+        """
+        Piecewise-linear quantile function: (cumulative count, value) knots from minimum to maximum.
+        """
+        positions = np.cumsum(self.counts) - self.counts / 2
+        return (np.concatenate([[0.0], positions, [self.count]]),
+                np.concatenate([[self.minimum], self.means, [self.maximum]]))
+
+    def quantile(self, q):
+        positions, values = self._knots()
+        return float(np.interp(q * positions[-1], positions, values))
+
+    def cdf(self, x):
+        positions, values = self._knots()
+        return float(np.interp(x, values, positions) / positions[-1])
+
+    def lower_tail_mean(self, q):
+        """
+        Mean of the lowest fraction q of the sample (CVaR at level q).
+        """
+        positions, values = self._knots()
+        # Integral of the piecewise-linear quantile function from 0 to q * count
+        areas = np.concatenate([[0.0], np.cumsum(np.diff(positions) * (values[1:] + values[:-1]) / 2)])
+        position = q * positions[-1]
+        i = min(int(np.searchsorted(positions, position, side="right")) - 1, positions.size - 2)
+        value = np.interp(position, positions, values)
+        area = areas[i] + (position - positions[i]) * (values[i] + value) / 2
+        return float(area / position)
+
+
+class StreamingAccumulator:
+    """
+    Constant-memory summary of an NPV stream: moments, quantile sketch and
+    the running count and sum of negative NPVs (P(NPV < 0) and CEL).
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.moments = OnlineMoments()
+        self.sketch = QuantileSketch(compression)
+        self.count_below_0 = 0
+        self.sum_below_0 = 0.0
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def update(self, NPV):
+        with stage("streaming_update"):
+            NPV = np.asarray(NPV, dtype=float)
+            self.moments.update(NPV)
+            self.sketch.update(NPV)
+            Below = NPV[NPV < 0]
+            self.count_below_0 += Below.size
+            self.sum_below_0 += float(np.sum(Below))
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.count_below_0 += other.count_below_0
+        self.sum_below_0 += other.sum_below_0
+
+    def descriptive_statistics(self):
+        """
+        STATISTICS DESCRIPTIVE, as simulation.descriptive_statistics (median from the sketch).
+        """
+        NPV_mean = self.moments.mean
+        NPV_standard_deviation = self.moments.standard_deviation
+        return {
+            "NPV_minimum": self.moments.minimum,
+            "NPV_maximum": self.moments.maximum,
+            "NPV_range": self.moments.maximum - self.moments.minimum,
+            "NPV_mean": NPV_mean,
+            "NPV_standard_deviation": NPV_standard_deviation,
+            "NPV_Coefficient_of_variation": (NPV_standard_deviation / NPV_mean) * 100,
+            "NPV_median": self.sketch.quantile(0.5),
+        }
+
+    def inferential_statistics(self, method="analytic", k=100000):
+        """
+        STATISTICS INFERENTIAL of the normal approximation, from the running moments.
+        """
+        return inferential_statistics(self.moments.mean, self.moments.standard_deviation, method, k)
+
+    def empirical_statistics(self, alpha=0.05):
+        """
+        STATISTICS INFERENTIAL estimated from the stream, as empirical.empirical_statistics.
+
+        P(NPV < 0) and CEL are exact; P(NPV < CEL), VaR and CVaR come from the sketch.
+        """
+        if self.count_below_0:
+            Probability_of_Financial_Deficit = self.count_below_0 / self.count
+            CEL = self.sum_below_0 / self.count_below_0
+            Probability_NPV_less_CEL = self.sketch.cdf(CEL)
+        else:
+            Probability_of_Financial_Deficit, CEL, Probability_NPV_less_CEL = 0.0, np.nan, 0.0
+        return inferential_block(self.moments.mean, Probability_of_Financial_Deficit, CEL, Probability_NPV_less_CEL,
+                                 self.sketch.quantile(alpha), self.sketch.lower_tail_mean(alpha))
+
+
+def iter_npv_chunks(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                    CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0, rng=None,
+                    chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields the NPV sample in blocks of at most chunk_size simulations.
+
+    The blocks concatenated are identical to simulation.simulate_npv with the same rng.
+    """
+    rng = as_random_source(rng)
+    for start in range(0, Number_of_simulations, chunk_size):
+        size = min(chunk_size, Number_of_simulations - start)
+        U = draw_uniforms(size, Planning_Horizon, rng)
+        yield npv_from_uniforms(U, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                                CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV)
+
+
+def simulate_npv_streaming(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                           CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV=0.0, rng=None,
+                           chunk_size=DEFAULT_CHUNK_SIZE, compression=DEFAULT_COMPRESSION):
+    """
+    Runs the simulation in blocks and returns a StreamingAccumulator of the NPVs.
+    """
+    Accumulator = StreamingAccumulator(compression)
+    for NPV in iter_npv_chunks(Planning_Horizon, Number_of_simulations, WACC_m, WACC_ml, WACC_M, CF_0_m, CF_0_M,
+                               CF_distributions_m, CF_distributions_ml, CF_distributions_M, RV, rng, chunk_size):
+        Accumulator.update(NPV)
+    return Accumulator
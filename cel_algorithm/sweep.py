@@ -0,0 +1,176 @@
+#####################################################################
+# Sensitivity and scenario sweeps with common random numbers
+#
+# All points of a sweep (and all bars of a tornado chart) are evaluated
+# on one shared block of uniforms, mapped through the inverse CDFs, so the
+# curves are free of simulation noise between points. The NPV is split
+# into its terms
+#     NPV = -CF_0 + sum_t CF_t * d_t + RV * d_H,   d_t = (1 + WACC)^-t
+# and only the terms that depend on the swept parameter are recomputed:
+# RV only touches the residual term, CF_0 bounds the initial investment,
+# one period's cash-flow triangle one column, the WACC triangle the
+# discounting, and Planning_Horizon is read from cumulative sums.
+#####################################################################
+
+import dataclasses
+
+import numpy as np
+
+from cel_algorithm.evaluation import result_from_sample
+from cel_algorithm.simulation import (
+    CF_0_COLUMN,
+    FIRST_CF_COLUMN,
+    WACC_COLUMN,
+    discount_factors,
+    draw_uniforms,
+    npv_from_draws,
+    triangular_ppf,
+    uniform_ppf,
+)
+
+PARAMETERS = ("Planning_Horizon", "WACC_m", "WACC_ml", "WACC_M", "CF_0_m", "CF_0_M",
+              "CF_distributions_m", "CF_distributions_ml", "CF_distributions_M", "RV")
+CF_PARAMETERS = ("CF_distributions_m", "CF_distributions_ml", "CF_distributions_M")
+WACC_PARAMETERS = ("WACC_m", "WACC_ml", "WACC_M")
+
+
+def resize_spec(spec, Planning_Horizon):
+    """
+    spec with another Planning_Horizon: cash-flow lists are truncated, or
+    extended when the distribution is the same in every period.
+    """
+    if Planning_Horizon <= spec.Planning_Horizon:
+        return dataclasses.replace(spec, Planning_Horizon=Planning_Horizon,
+                                   **{field: getattr(spec, field)[:Planning_Horizon] for field in CF_PARAMETERS})
+    if any(len(set(getattr(spec, field))) > 1 for field in CF_PARAMETERS):
+        raise ValueError("only a fixed cash-flow distribution can be extended to a longer Planning_Horizon")
+    return dataclasses.replace(spec, Planning_Horizon=Planning_Horizon,
+                               **{field: getattr(spec, field)[:1] * Planning_Horizon for field in CF_PARAMETERS})
+
+
+def spec_with_value(spec, parameter, value, period=None):
+    """
+    spec with one input changed; for cash-flow parameters, period selects a
+    single period (0-based), otherwise value is a list or applies to every period.
+    """
+    if parameter not in PARAMETERS:
+        raise ValueError(f"unknown parameter {parameter!r}, expected one of {PARAMETERS}")
+    if parameter == "Planning_Horizon":
+        return resize_spec(spec, int(value))
+    if parameter in CF_PARAMETERS:
+        values = list(getattr(spec, parameter))
+        if period is not None:
+            values[period] = value
+        elif np.ndim(value) == 0:
+            values = [value] * spec.Planning_Horizon
+        else:
+            values = list(value)
+        return dataclasses.replace(spec, **{parameter: values})
+    return dataclasses.replace(spec, **{parameter: value})
+
+
+class CommonRandomNumbers:
+    """
+    One shared uniform block for spec and the NPV terms computed from it.
+
+    max_horizon reserves columns for Planning_Horizon sweeps beyond spec's horizon.
+    """
+
+    def __init__(self, spec, Number_of_simulations, rng=None, max_horizon=None):
+        self.spec = spec
+        self.base = resize_spec(spec, max(spec.Planning_Horizon, max_horizon or 0))
+        self.U = draw_uniforms(Number_of_simulations, self.base.Planning_Horizon, rng)
+        H = self.base.Planning_Horizon
+        self.CF_0 = uniform_ppf(self.U[:, CF_0_COLUMN], spec.CF_0_m, spec.CF_0_M)
+        self.discount = discount_factors(
+            triangular_ppf(self.U[:, WACC_COLUMN], spec.WACC_m, spec.WACC_ml, spec.WACC_M), H)
+        self.CF = triangular_ppf(self.U[:, FIRST_CF_COLUMN:], np.array(self.base.CF_distributions_m),
+                                 np.array(self.base.CF_distributions_ml), np.array(self.base.CF_distributions_M))
+        self.PV = self.CF * self.discount  # discounted cash flow of every period
+        self.PV_cumulative = np.cumsum(self.PV, axis=1)
+
+    def npv(self, parameter, values, period=None):
+        """
+        NPV matrix of shape (len(values), Number_of_simulations) and the swept specs.
+        """
+        spec = self.spec
+        specs = [spec_with_value(spec, parameter, value, period) for value in values]
+        H = spec.Planning_Horizon
+        discount_H = self.discount[:, H - 1]
+        PV_sum = self.PV_cumulative[:, H - 1]
+
+        if parameter == "Planning_Horizon":
+            if max(values) > self.base.Planning_Horizon:
+                raise ValueError("Planning_Horizon beyond max_horizon of the shared draws")
+            horizons = np.array([int(value) for value in values]) - 1
+            NPV = (self.PV_cumulative[:, horizons] + spec.RV * self.discount[:, horizons]).T - self.CF_0
+        elif parameter == "RV":
+            NPV = (PV_sum - self.CF_0) + np.asarray(values, dtype=float)[:, None] * discount_H
+        elif parameter in ("CF_0_m", "CF_0_M"):
+            low = np.array([s.CF_0_m for s in specs])[:, None]
+            high = np.array([s.CF_0_M for s in specs])[:, None]
+            NPV = (PV_sum + spec.RV * discount_H) - uniform_ppf(self.U[:, CF_0_COLUMN], low, high)
+        elif parameter in WACC_PARAMETERS:
+            # Only the discounting changes: one discount matrix per value
+            NPV = np.empty((len(specs), self.U.shape[0]))
+            CF = self.CF[:, :H]
+            for i, s in enumerate(specs):
+                discount = discount_factors(triangular_ppf(self.U[:, WACC_COLUMN], s.WACC_m, s.WACC_ml, s.WACC_M), H)
+                NPV[i] = npv_from_draws(self.CF_0, CF, discount, s.RV)
+        elif period is not None:
+            # Only column period changes
+            column = self.U[:, FIRST_CF_COLUMN + period]
+            CF_t = triangular_ppf(column, np.array([s.CF_distributions_m[period] for s in specs])[:, None],
+                                  np.array([s.CF_distributions_ml[period] for s in specs])[:, None],
+                                  np.array([s.CF_distributions_M[period] for s in specs])[:, None])
+            NPV = (PV_sum - self.PV[:, period] + spec.RV * discount_H - self.CF_0) + CF_t * self.discount[:, period]
+        else:
+            NPV = np.empty((len(specs), self.U.shape[0]))
+            for i, s in enumerate(specs):
+                CF = triangular_ppf(self.U[:, FIRST_CF_COLUMN:FIRST_CF_COLUMN + H], np.array(s.CF_distributions_m),
+                                    np.array(s.CF_distributions_ml), np.array(s.CF_distributions_M))
+                NPV[i] = npv_from_draws(self.CF_0, CF, self.discount[:, :H], spec.RV)
+        return NPV, specs
+
+
+def sweep(spec, parameter, values, Number_of_simulations=10000, rng=None, period=None, method="analytic",
+          k=100000, alpha=0.05, draws=None):
+    """
+    Evaluates spec for every value of one parameter on common random numbers.
+
+    Returns one result record (see ProjectResult.to_record) per value, with
+    "parameter" and "value" columns. Pass draws (a CommonRandomNumbers) to
+    share the uniforms with other sweeps.
+    """
+    if draws is None:
+        max_horizon = int(max(values)) if parameter == "Planning_Horizon" else None
+        draws = CommonRandomNumbers(spec, Number_of_simulations, rng, max_horizon)
+    NPV, specs = draws.npv(parameter, values, period)
+    records = []
+    for value, s, sample in zip(values, specs, NPV):
+        record = {"parameter": parameter if period is None else f"{parameter}[{period}]", "value": value}
+        record.update(result_from_sample(s, sample, method, k, alpha).to_record())
+        records.append(record)
+    return records
+
+
+def tornado(spec, ranges, Number_of_simulations=10000, rng=None, statistic="Empirical_CEL", method="analytic",
+            k=100000, alpha=0.05):
+    """
+    Tornado chart data: statistic at the low and high value of every input.
+
+    ranges maps a parameter name, or (parameter, period) for one period's
+    cash flow, to (low, high). All bars share one uniform block. Returns rows
+    (parameter, low, high, statistic at low, statistic at high, swing) sorted
+    by decreasing swing.
+    """
+    horizons = [value for parameter, bounds in ranges.items() if parameter == "Planning_Horizon" for value in bounds]
+    draws = CommonRandomNumbers(spec, Number_of_simulations, rng, int(max(horizons)) if horizons else None)
+    rows = []
+    for key, (low, high) in ranges.items():
+        parameter, period = key if isinstance(key, tuple) else (key, None)
+        records = sweep(spec, parameter, [low, high], period=period, method=method, k=k, alpha=alpha, draws=draws)
+        at_low, at_high = records[0][statistic], records[1][statistic]
+        rows.append({"parameter": records[0]["parameter"], "low": low, "high": high,
+                     "at_low": at_low, "at_high": at_high, "swing": abs(at_high - at_low)})
+    return sorted(rows, key=lambda row: -row["swing"] if np.isfinite(row["swing"]) else np.inf)
@@ -0,0 +1,13 @@
+import pytest
+
+from cel_algorithm.spec import ProjectSpec
+
+
+@pytest.fixture
+def spec():
+    """
+    Project of CEL_Algorithm_2.py with a per-period cash-flow distribution and
+    a P(NPV < 0) of about 0.3, so every statistic is defined.
+    """
+    return ProjectSpec(4, 0.08, 0.1, 0.14, 100.0, 140.0, (20.0, 25.0, 30.0, 35.0), (30.0, 35.0, 40.0, 45.0),
+                       (50.0, 55.0, 60.0, 65.0), RV=10.0, name="test")
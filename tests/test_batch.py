@@ -0,0 +1,33 @@
+import dataclasses
+
+import numpy as np
+
+from cel_algorithm.batch import evaluate_portfolio, group_npv
+from cel_algorithm.evaluation import evaluate_project
+from cel_algorithm.simulation import draw_uniforms, npv_from_uniforms
+
+
+def test_group_npv_rows_equal_npv_from_uniforms(spec):
+    specs = [spec, dataclasses.replace(spec, RV=50.0), dataclasses.replace(spec, WACC_ml=0.12),
+             dataclasses.replace(spec, CF_0_M=180.0)]
+    U = draw_uniforms(5000, spec.Planning_Horizon, 2)
+    NPV = group_npv(U, specs)
+    assert NPV.shape == (len(specs), 5000)
+    for row, other in zip(NPV, specs):
+        np.testing.assert_allclose(row, npv_from_uniforms(U, *other.simulation_arguments()), rtol=1e-12)
+
+
+def test_single_project_portfolio_matches_evaluate_project(spec):
+    row, = evaluate_portfolio([spec], 5000, 9)
+    record = evaluate_project(spec, 5000, 9).to_record()
+    for key in ("NPV_mean", "NPV_standard_deviation", "CEL", "CVaR_5"):
+        np.testing.assert_allclose(row[key], record[key], rtol=1e-12)
+
+
+def test_group_npv_with_one_block_per_project(spec):
+    specs = [spec, dataclasses.replace(spec, WACC_ml=0.12), dataclasses.replace(spec, RV=50.0)]
+    U = np.stack([draw_uniforms(3000, spec.Planning_Horizon, seed) for seed in (1, 2, 3)])
+    NPV = group_npv(U, specs)
+    assert NPV.shape == (len(specs), 3000)
+    for row, block, other in zip(NPV, U, specs):
+        np.testing.assert_allclose(row, npv_from_uniforms(block, *other.simulation_arguments()), rtol=1e-12)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from cel_algorithm.distributions import Histogram, Pert, distribution
+
+
+def test_histogram_skips_empty_interior_bin():
+    histogram = Histogram([0, 1, 2, 3], [1, 0, 1])
+    np.testing.assert_allclose(histogram.exact_ppf([0.0, 0.25, 0.5, 0.75, 1.0]), [0.0, 0.5, 1.0, 2.5, 3.0])
+    sample = histogram.sample(200000, np.random.default_rng(1))
+    assert not np.any((sample > 1) & (sample < 2))
+    assert abs(np.mean(sample) - 1.5) < 0.01
+
+
+def test_histogram_with_empty_outer_bins():
+    histogram = Histogram([0, 1, 2, 3, 4], [0, 2, 0, 2])
+    np.testing.assert_allclose(histogram.exact_ppf([0.0, 0.25, 0.5, 0.75, 1.0]), [1.0, 1.5, 2.0, 3.5, 4.0])
+
+
+@pytest.mark.parametrize("mode", [0.0, 10.0])
+def test_pert_with_mode_at_a_bound(mode):
+    pert = Pert(0.0, mode, 10.0)
+    U = np.linspace(0.0, 1.0, 11)
+    values = pert.exact_ppf(U)
+    assert np.all(np.isfinite(values))
+    assert np.all(np.diff(values) >= 0)
+    # Beta(1, 5) or Beta(5, 1) median
+    median = 10 * (1 - 0.5 ** 0.2) if mode == 0.0 else 10 * 0.5 ** 0.2
+    np.testing.assert_allclose(pert.exact_ppf(0.5), median, rtol=1e-4)
+
+
+def test_lookup_table_matches_exact_ppf():
+    normal = distribution("normal", 2.0, 3.0)
+    U = np.linspace(0.01, 0.99, 99)
+    np.testing.assert_allclose(normal.ppf(U), normal.exact_ppf(U), atol=1e-6)
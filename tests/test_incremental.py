@@ -0,0 +1,38 @@
+import dataclasses
+
+import numpy as np
+
+from cel_algorithm.evaluation import result_from_sample
+from cel_algorithm.incremental import IncrementalEvaluation
+from cel_algorithm.simulation import npv_from_uniforms
+
+
+def test_incremental_npv_equals_fresh_run(spec):
+    Evaluation = IncrementalEvaluation(spec, 5000, seed=4)
+    edits = [dataclasses.replace(spec, RV=40.0),
+             dataclasses.replace(spec, RV=40.0, CF_distributions_ml=(30.0, 50.0, 40.0, 45.0)),
+             dataclasses.replace(spec, RV=40.0, CF_distributions_ml=(30.0, 50.0, 40.0, 45.0), WACC_M=0.2),
+             dataclasses.replace(spec, CF_0_m=90.0)]
+    for edit in edits:
+        result = Evaluation.evaluate(edit)
+        NPV = npv_from_uniforms(Evaluation.U, *edit.simulation_arguments())
+        np.testing.assert_allclose(Evaluation.NPV, NPV, rtol=1e-12, atol=1e-10)
+        fresh = result_from_sample(edit, NPV)
+        np.testing.assert_allclose(result.empirical["CEL"], fresh.empirical["CEL"], rtol=1e-10)
+
+
+def test_period_edit_touches_one_column(spec):
+    Evaluation = IncrementalEvaluation(spec, 1000, seed=4)
+    Evaluation.evaluate(dataclasses.replace(spec, CF_distributions_M=(50.0, 55.0, 70.0, 65.0)))
+    assert Evaluation.changed_columns == 1
+
+
+def test_kept_result_keeps_state_in_sync(spec):
+    Evaluation = IncrementalEvaluation(spec, 1000, seed=4)
+    first = Evaluation.evaluate()
+    edit = dataclasses.replace(spec, RV=40.0)
+    Evaluation.evaluate(edit)
+    assert Evaluation.evaluate(spec) is first
+    assert Evaluation.spec == spec
+    np.testing.assert_allclose(Evaluation.NPV, npv_from_uniforms(Evaluation.U, *spec.simulation_arguments()),
+                               rtol=1e-12, atol=1e-10)
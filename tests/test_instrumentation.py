@@ -0,0 +1,36 @@
+import threading
+
+from cel_algorithm import instrumentation
+
+
+def test_instrumented_blocks_in_threads_keep_their_own_stats():
+    barrier = threading.Barrier(4)
+    collected = {}
+
+    def work(name):
+        with instrumentation.instrumented() as stats:
+            barrier.wait()
+            for _ in range(100):
+                with instrumentation.stage(name):
+                    with instrumentation.stage("inner"):
+                        instrumentation.count("draws", 2)
+            barrier.wait()
+        collected[name] = stats
+
+    threads = [threading.Thread(target=work, args=(f"worker{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for name, stats in collected.items():
+        assert sorted(stats.stages) == [name, f"{name}/inner"]
+        assert stats.stages[f"{name}/inner"].calls == 100
+        assert stats.counters["draws"] == 200
+    assert all(instrumentation.get_stats() is not stats for stats in collected.values())
+
+
+def test_stage_is_a_no_op_when_disabled():
+    instrumentation.disable()
+    with instrumentation.stage("ignored"):
+        instrumentation.count("draws")
+    assert "ignored" not in instrumentation.get_stats().stages
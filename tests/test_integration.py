@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from cel_algorithm.integration import inferential_statistics, normal_cdf, normal_ppf
+
+
+@pytest.mark.parametrize("NPV_mean, NPV_standard_deviation", [(10.0, 30.0), (-5.0, 20.0), (1e6, 8e5)])
+def test_analytic_matches_midpoint(NPV_mean, NPV_standard_deviation):
+    analytic = inferential_statistics(NPV_mean, NPV_standard_deviation, "analytic")
+    midpoint = inferential_statistics(NPV_mean, NPV_standard_deviation, "midpoint", k=100000)
+    assert analytic.keys() == midpoint.keys()
+    for key in analytic:
+        np.testing.assert_allclose(midpoint[key], analytic[key], rtol=1e-6, err_msg=key)
+
+
+def test_normal_cdf_ppf_round_trip():
+    U = np.concatenate([np.linspace(1e-9, 1 - 1e-9, 10001), [1e-300, 1e-12]])
+    np.testing.assert_allclose(normal_cdf(normal_ppf(U)), U, rtol=1e-14, atol=1e-16)
+    assert normal_ppf(0.5) == 0.0
+    np.testing.assert_allclose(normal_ppf(0.975), 1.959963984540054, rtol=1e-15)
@@ -0,0 +1,28 @@
+import numpy as np
+
+from cel_algorithm.parallel import simulate_npv_parallel, spawn_generators, split_simulations
+from cel_algorithm.streaming import simulate_npv_streaming
+
+
+def test_split_simulations():
+    assert split_simulations(10, 3) == [4, 3, 3]
+    assert sum(split_simulations(10001, 8)) == 10001
+
+
+def test_reproducible_for_seed_and_workers(spec):
+    runs = [simulate_npv_parallel(spec.Planning_Horizon, 20000, *spec.simulation_arguments(), seed=11, workers=2,
+                                  chunk_size=4000) for _ in range(2)]
+    assert runs[0].count == runs[1].count == 20000
+    assert runs[0].moments.mean == runs[1].moments.mean
+    assert runs[0].moments.variance == runs[1].moments.variance
+    assert runs[0].sum_below_0 == runs[1].sum_below_0
+    assert runs[0].sketch.quantile(0.5) == runs[1].sketch.quantile(0.5)
+
+
+def test_workers_run_their_spawned_streams(spec):
+    Accumulator = simulate_npv_parallel(spec.Planning_Horizon, 9000, *spec.simulation_arguments(), seed=11,
+                                        workers=1)
+    reference = simulate_npv_streaming(spec.Planning_Horizon, 9000, *spec.simulation_arguments(),
+                                       rng=spawn_generators(11, 1)[0])
+    assert Accumulator.moments.mean == reference.moments.mean
+    assert Accumulator.sum_below_0 == reference.sum_below_0
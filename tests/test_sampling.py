@@ -0,0 +1,23 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from cel_algorithm.sampling import SAMPLERS, sample_uniforms
+
+pytest.importorskip("scipy")
+
+
+@pytest.mark.parametrize("sampling", SAMPLERS)
+def test_designs_are_uniform_blocks(sampling):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        U = sample_uniforms(1024, 4, sampling, 1)
+    assert U.shape == (1024, 6)
+    assert np.all((U >= 0) & (U < 1))
+    np.testing.assert_allclose(U.mean(axis=0), 0.5, atol=0.03)
+
+
+def test_sobol_rejects_sizes_that_are_not_powers_of_2():
+    with pytest.raises(ValueError, match="power-of-2"):
+        sample_uniforms(1000, 4, "sobol", 1)
@@ -0,0 +1,43 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from cel_algorithm.evaluation import evaluate_project
+from cel_algorithm.service import evaluate_batch, parse_request
+
+
+def test_parse_request_rejects_invalid_options(spec):
+    for options in ({"alpha": 1.5}, {"k": 0}, {"method": "simpson", "k": 3}, {"Number_of_simulations": 0}):
+        with pytest.raises(ValueError):
+            parse_request({"spec": spec.to_record(), **options})
+
+
+def test_failing_request_does_not_fail_its_batch(spec):
+    good = parse_request({"spec": spec.to_record(), "Number_of_simulations": 2000, "seed": 3})
+    bad = good[:5] + (2.0,)  # alpha out of range, past parse_request
+    records = evaluate_batch([good, bad, good])
+    assert isinstance(records[1], ValueError)
+    expected = evaluate_project(spec, 2000, 3).to_record()
+    for record in (records[0], records[2]):
+        for key in ("NPV_mean", "CEL", "CVaR_5"):
+            np.testing.assert_allclose(record[key], expected[key], rtol=1e-12)
+
+
+def test_batch_groups_reproduce_evaluate_project(spec):
+    other = dataclasses.replace(spec, Planning_Horizon=2, CF_distributions_m=spec.CF_distributions_m[:2],
+                                CF_distributions_ml=spec.CF_distributions_ml[:2],
+                                CF_distributions_M=spec.CF_distributions_M[:2], WACC_ml=0.12)
+    requests = [(spec, 2000, 1, "analytic", 100000, 0.05), (other, 2000, 2, "analytic", 100000, 0.05),
+                (spec, 1000, 3, "analytic", 100000, 0.05), (dataclasses.replace(spec, RV=40.0), 2000, 4,
+                                                            "analytic", 100000, 0.05)]
+    for record, (request_spec, n, seed, *_) in zip(evaluate_batch(requests), requests):
+        expected = evaluate_project(request_spec, n, seed).to_record()
+        for key in ("NPV_mean", "NPV_standard_deviation", "CEL", "CVaR_5"):
+            np.testing.assert_allclose(record[key], expected[key], rtol=1e-12)
+
+
+def test_unseeded_requests_draw_independent_streams(spec):
+    request = (spec, 2000, None, "analytic", 100000, 0.05)
+    first, second = evaluate_batch([request, request])
+    assert first["NPV_mean"] != second["NPV_mean"]
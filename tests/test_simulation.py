@@ -0,0 +1,33 @@
+import numpy as np
+
+from cel_algorithm.simulation import draw_uniforms, npv_from_uniforms, simulate_npv
+
+
+def script_npv(spec, Number_of_simulations, seed):
+    # the per-draw loop of CEL_Algorithm_2.py after np.random.seed(seed)
+    random = np.random.RandomState(seed)
+    NPV = []
+    for i in range(Number_of_simulations):
+        CF_0 = random.uniform(spec.CF_0_m, spec.CF_0_M)
+        NPV_year = - CF_0
+        WACC_year = random.triangular(spec.WACC_m, spec.WACC_ml, spec.WACC_M)
+        for j in range(spec.Planning_Horizon):
+            year = j + 1
+            CF_year = random.triangular(spec.CF_distributions_m[j], spec.CF_distributions_ml[j],
+                                        spec.CF_distributions_M[j])
+            NPV_year += CF_year / ((1 + WACC_year) ** year)
+        NPV_year += spec.RV / ((1 + WACC_year) ** spec.Planning_Horizon)
+        NPV.append(NPV_year)
+    return np.array(NPV)
+
+
+def test_simulate_npv_matches_script_loop(spec):
+    NPV = simulate_npv(spec.Planning_Horizon, 2000, *spec.simulation_arguments(), rng=7)
+    np.testing.assert_allclose(NPV, script_npv(spec, 2000, 7), rtol=1e-12)
+
+
+def test_uniform_block_layout(spec):
+    U = draw_uniforms(100, spec.Planning_Horizon, 3)
+    assert U.shape == (100, spec.Planning_Horizon + 2)
+    np.testing.assert_array_equal(npv_from_uniforms(U, *spec.simulation_arguments()),
+                                  simulate_npv(spec.Planning_Horizon, 100, *spec.simulation_arguments(), rng=3))
@@ -0,0 +1,31 @@
+import dataclasses
+
+import pytest
+
+from cel_algorithm.batch import read_specs
+from cel_algorithm.cache import spec_hash
+from cel_algorithm.spec import ProjectSpec
+
+
+def test_equal_specs_share_a_hash():
+    ints = ProjectSpec.fixed(3, 0.1, 0.12, 0.14, 100, 120, 30, 45, 70)
+    floats = ProjectSpec.fixed(3, 0.1, 0.12, 0.14, 100.0, 120.0, 30.0, 45.0, 70.0)
+    assert ints == floats
+    assert spec_hash(ints) == spec_hash(floats)
+
+
+@pytest.mark.parametrize("changes", [{"WACC_m": 0.13}, {"WACC_M": 0.09}, {"CF_0_M": 100.0},
+                                     {"CF_distributions_ml": (30.0, 80.0, 40.0, 45.0)},
+                                     {"CF_distributions_M": (50.0, 55.0, 60.0, 20.0)}])
+def test_invalid_triangles_are_rejected(spec, changes):
+    with pytest.raises(ValueError):
+        dataclasses.replace(spec, **changes)
+
+
+def test_read_specs_names_the_invalid_row(tmp_path):
+    path = tmp_path / "projects.csv"
+    path.write_text("name,Planning_Horizon,WACC_m,WACC_ml,WACC_M,CF_0_m,CF_0_M,CF_m,CF_ml,CF_M\n"
+                    "a,3,0.1,0.12,0.14,100,120,30,45,70\n"
+                    "b,3,0.15,0.12,0.14,100,120,30,45,70\n")
+    with pytest.raises(ValueError, match="row 2"):
+        read_specs(path)
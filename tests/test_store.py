@@ -0,0 +1,17 @@
+import numpy as np
+
+from cel_algorithm.empirical import empirical_statistics
+from cel_algorithm.simulation import simulate_npv
+from cel_algorithm.store import write_npv_store
+
+
+def test_store_statistics_match_sample(spec, tmp_path):
+    NPV = simulate_npv(spec.Planning_Horizon, 10000, *spec.simulation_arguments(), rng=5)
+    Store = write_npv_store(str(tmp_path / "store"), spec, 10000, seed=5, chunk_size=700)
+    m = 500
+    np.testing.assert_array_equal(np.sort(Store.smallest(m)), np.sort(NPV)[:m])
+    expected = empirical_statistics(NPV, 0.05)
+    for Accumulator in (None, Store.accumulator()):
+        actual = Store.empirical_statistics(0.05, Accumulator=Accumulator)
+        for key, value in expected.items():
+            np.testing.assert_allclose(actual[key], value, rtol=1e-9, err_msg=key)
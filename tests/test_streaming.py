@@ -0,0 +1,34 @@
+import numpy as np
+
+from cel_algorithm.simulation import simulate_npv
+from cel_algorithm.streaming import StreamingAccumulator, iter_npv_chunks, simulate_npv_streaming
+
+
+def test_chunks_concatenate_to_simulate_npv(spec):
+    chunks = list(iter_npv_chunks(spec.Planning_Horizon, 10000, *spec.simulation_arguments(), rng=5, chunk_size=3000))
+    assert [chunk.size for chunk in chunks] == [3000, 3000, 3000, 1000]
+    np.testing.assert_array_equal(np.concatenate(chunks),
+                                  simulate_npv(spec.Planning_Horizon, 10000, *spec.simulation_arguments(), rng=5))
+
+
+def test_accumulator_matches_sample(spec):
+    NPV = simulate_npv(spec.Planning_Horizon, 10000, *spec.simulation_arguments(), rng=5)
+    Accumulator = simulate_npv_streaming(spec.Planning_Horizon, 10000, *spec.simulation_arguments(), rng=5,
+                                         chunk_size=3000)
+    assert Accumulator.count == NPV.size
+    np.testing.assert_allclose(Accumulator.moments.mean, np.mean(NPV), rtol=1e-12)
+    np.testing.assert_allclose(Accumulator.moments.standard_deviation, np.std(NPV), rtol=1e-12)
+    assert Accumulator.count_below_0 == np.count_nonzero(NPV < 0)
+    np.testing.assert_allclose(Accumulator.sum_below_0, np.sum(NPV[NPV < 0]), rtol=1e-12)
+
+
+def test_merge_equals_single_pass(spec):
+    NPV = simulate_npv(spec.Planning_Horizon, 10000, *spec.simulation_arguments(), rng=5)
+    whole, first, second = StreamingAccumulator(), StreamingAccumulator(), StreamingAccumulator()
+    whole.update(NPV)
+    first.update(NPV[:4000])
+    second.update(NPV[4000:])
+    first.merge(second)
+    assert first.count == whole.count
+    np.testing.assert_allclose(first.moments.mean, whole.moments.mean, rtol=1e-12)
+    np.testing.assert_allclose(first.moments.variance, whole.moments.variance, rtol=1e-12)